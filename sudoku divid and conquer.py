@@ -1,33 +1,157 @@
 import tkinter as tk
 from tkinter import messagebox
-import heapq
+import argparse
 import random
-import copy
+import os
+from sudoku_board import Board, parse_symbol, symbol
+from sudoku_canon import SolutionCache
+from sudoku_canvas import BoardCanvas
+from sudoku_logic import SIZES, geometry, masks_from_cells, propagate, undo
+from sudoku_queue import MRVQueue
+from sudoku_library import PuzzleLibrary
+from sudoku_prefetch import PuzzlePool
+from sudoku_rating import HOLE_FRACTIONS, generate_in_band
+from sudoku_stats import SearchStats
+from sudoku_worker import AITask
+
+
+# -------------------------------------------------------------------------
+#  DIVIDE AND CONQUER SOLVER
+# -------------------------------------------------------------------------
+# Kept at module level (no GUI state) so the same search can be driven
+# headlessly, e.g. by sudoku_batch.py.
+
+# The game's solves go through a solution cache (SudokuDuel.solve_dnc);
+# batch runs call solve_dnc directly and skip it.
+SOLUTIONS = SolutionCache()
+
+def get_candidates(board, row, col):
+    geo = geometry(board.size)
+    i = row * geo.size + col
+    cells = board.cells
+    if cells[i] != 0: return frozenset()
+    return geo.digits.difference(geo.peer_values[i](cells))
+
+
+def solve_dnc(board_snapshot, check=None, stats=None):
+    # Create a working copy to avoid mutating the input.
+    # `check`, if given, is called at every node and may raise to abort
+    # (used for cancellation / deadlines when solving off the Tk thread).
+    # `stats`, if given, is a SearchStats that collects the search's work.
+    # Any grid size works; it is taken from the board.
+    board = Board(board_snapshot)
+    if stats is None:
+        return _solve_dnc_helper(board, check)
+    with stats.phase("search"):
+        return stats.call(_solve_dnc_helper, board, check, stats)
+
+
+def _solve_dnc_helper(board, check=None, stats=None):
+    if check is not None:
+        check()
+
+    # 0. PROPAGATE (fill forced cells: naked/hidden singles, locked candidates)
+    cells = board.cells
+    geo = geometry(board.size)
+    n = geo.size
+    rows, cols, boxes, empty_cells = masks_from_cells(cells, geo)
+    trail = []
+    ok = propagate(cells, rows, cols, boxes, empty_cells, [0] * geo.ncells, trail, geo)
+    if stats is not None:
+        stats.propagations += 1
+        stats.forced += len(trail)
+    if not ok:
+        undo(cells, rows, cols, boxes, empty_cells, trail, geo)
+        return None
+
+    # 1. PIVOT (Find MRV)
+    best_cell = None
+    best_candidates = None
+    min_candidates_count = n + 1
+    digits, peer_values = geo.digits, geo.peer_values
+
+    for r in range(n):
+        for c in range(n):
+            i = r * n + c
+            if cells[i] == 0:
+                candidates = digits.difference(peer_values[i](cells))
+                count = len(candidates)
+                if count == 0: # Dead end
+                    undo(cells, rows, cols, boxes, empty_cells, trail, geo)
+                    return None
+
+                if count < min_candidates_count:
+                    min_candidates_count = count
+                    best_cell = (r, c)
+                    best_candidates = candidates  # FIX: Store candidates to avoid recalculating
+                    if count == 1: break
+        if min_candidates_count == 1: break
+
+    # 2. BASE CASE
+    if best_cell is None:
+        return board
+
+    # 3. DIVIDE & CONQUER
+    row, col = best_cell
+
+    for val in best_candidates:
+        cells[row * n + col] = val
+        if stats is None:
+            result = _solve_dnc_helper(board, check)
+        else:
+            result = stats.call(_solve_dnc_helper, board, check, stats)
+        if result is not None:
+            return result
+        cells[row * n + col] = 0 # Backtrack
+
+    undo(cells, rows, cols, boxes, empty_cells, trail, geo)
+    return None
+
 
 class SudokuDuel:
-    def __init__(self, root):
+    # Pause before the AI replies to a user move
+    AI_DELAY_MS = 300
+    # AI search runs off the Tk thread; give up after this many seconds
+    AI_TIMEOUT = 5.0
+
+    def __init__(self, root, size=9, library=None):
         self.root = root
-        self.root.title("Sudoku Duel — User vs D&C AI")
-        self.root.geometry("600x750")
+        # Grid size n: an n x n board of sqrt(n) x sqrt(n) boxes
+        self.size = size
+        self.geo = geometry(size)
+        self.root.title("Sudoku Duel — User vs D&C AI" if size == 9 else
+                        f"Sudoku Duel — User vs D&C AI ({size}x{size})")
+        if size == 9:
+            self.root.geometry("600x750")
         self.root.configure(bg="#ffffff")
         self.root.resizable(False, False)
         
         # Game state
-        self.board = [[0]*9 for _ in range(9)]
-        self.initial_board = [[0]*9 for _ in range(9)]
-        self.solution_board = [[0]*9 for _ in range(9)]
+        self.board = Board(size=size)
+        self.initial_board = Board(size=size)
+        self.solution_board = Board(size=size)
         self.current_turn = "user"
-        self.cells = [[None]*9 for _ in range(9)]
-        self.pq = []
-        self.pq_entries = set()  # FIX: Track entries to avoid duplicates
+        self.pq = MRVQueue(size)  # Empty cells by candidate count
         self.difficulty = "Medium"
         self.difficulty_var = tk.StringVar(value=self.difficulty)
         self.game_over = False  # FIX: Flag to prevent actions after game ends
-
+        self.ai_task = None  # In-flight background AI search (None when idle)
+        self.puzzle_task = None  # In-flight puzzle generation (None when idle)
+        # A full solution consistent with every filled cell, or None when a
+        # divergent user move invalidated it and it must be re-solved
+        self.solution_cache = None
+
+        # Ready-made puzzles per difficulty, refilled in the background
+        pool_file = "dnc_puzzles.json" if size == 9 else f"dnc_puzzles_{size}.json"
+        self.puzzles = PuzzlePool(self.make_puzzle,
+                                  path=os.path.join(os.path.expanduser("~"), ".sudoku_duel", pool_file),
+                                  library=library)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Create GUI
         self.create_widgets()
         self.new_game()
+        self.puzzles.start()
 
     def on_difficulty_change(self):
         self.difficulty = self.difficulty_var.get()
@@ -63,18 +187,8 @@ class SudokuDuel:
         board_frame = tk.Frame(self.root, bg="#d0d0d0", bd=4, relief=tk.SUNKEN)
         board_frame.pack(pady=10)
         
-        for i in range(9):
-            for j in range(9):
-                pady_top = 2 if i % 3 == 0 and i != 0 else 0
-                padx_left = 2 if j % 3 == 0 and j != 0 else 0
-                
-                cell = tk.Entry(board_frame, width=3, font=("Helvetica", 20, "bold"),
-                                justify="center", bd=1, relief=tk.SOLID,
-                                bg="white", disabledbackground="white",
-                                disabledforeground="black")
-                cell.grid(row=i, column=j, padx=(padx_left, 0), pady=(pady_top, 0))
-                cell.bind("<KeyRelease>", lambda e, r=i, c=j: self.on_cell_edit(r, c))
-                self.cells[i][j] = cell
+        self.view = BoardCanvas(board_frame, self.size, self.on_cell_edit)
+        self.view.pack()
         
         button_frame = tk.Frame(self.root, bg="#ffffff")
         
@@ -83,6 +197,15 @@ class SudokuDuel:
         tk.Checkbutton(self.root, text="Strict Mode (Correct Only)",
                        variable=self.strict_var,
                        bg="#ffffff").pack(pady=5)
+
+        # Solver stats line, filled in after each search while ticked
+        self.stats_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.root, text="Show Solver Stats",
+                       variable=self.stats_var, bg="#ffffff",
+                       command=lambda: self.stats_label.config(text="")).pack()
+        self.stats_label = tk.Label(self.root, text="", font=("Helvetica", 9),
+                                    bg="#ffffff", fg="#555555", wraplength=560)
+        self.stats_label.pack(pady=2)
         button_frame.pack(pady=20)
         
         tk.Button(button_frame, text="New Game", command=self.new_game,
@@ -94,214 +217,202 @@ class SudokuDuel:
         tk.Button(button_frame, text="Reset", command=self.reset_board,
                   font=("Helvetica", 12), bg="#FF9800", fg="white").grid(row=0, column=3, padx=5)
 
-    def generate_puzzle(self,difficulty=None):
-        if difficulty is None:
-            difficulty = self.difficulty
+    def make_puzzle(self, difficulty):
+        # Pure generator (no widget/game state): safe on the prefetch thread.
+        # Returns (puzzle, solution), rated inside the difficulty's band
+        # (sudoku_rating.BANDS); the hole counts only cap how far Easy and
+        # Hard dig.
+        new_grid = lambda: Board(self.shuffle_board(self.get_base_pattern()))
+        if self.size != 9:
+            # No technique rating off 9x9: random holes, a share of the cells
+            ncells = self.geo.ncells
+            fraction = HOLE_FRACTIONS[self.size].get(difficulty, HOLE_FRACTIONS[self.size]["Medium"])
+            solution = new_grid()
+            board = solution.copy()
+            for i in random.sample(range(ncells), round(ncells * fraction)):
+                board.cells[i] = 0
+            return board, solution
 
-        full_board = self.shuffle_board(self.get_base_pattern())
-        self.solution_board = copy.deepcopy(full_board)
-        self.board = copy.deepcopy(full_board)
-        
-        cells = [(i, j) for i in range(9) for j in range(9)]
-        random.shuffle(cells)
-        
         if difficulty == "Easy":
-            remove_count = random.randint(35, 40)
-        elif difficulty == "Medium":
-            remove_count = random.randint(45, 50)
+            target_holes = random.randint(35, 40)
         elif difficulty == "Hard":
-            remove_count = random.randint(55, 60)
+            target_holes = random.randint(55, 60)
         else:
-            remove_count = random.randint(45, 50)
-
-        # Remove numbers to create the puzzle (Easy-Medium difficulty)
-        for i in range(remove_count):
-            r, c = cells[i]
-            self.board[r][c] = 0
-        return self.board
+            difficulty = "Medium"
+            target_holes = 81
+        return generate_in_band(new_grid, difficulty, target_holes)
     
     def get_base_pattern(self):
-        def pattern(r, c): return (3 * (r % 3) + r // 3 + c) % 9
-        nums = list(range(1, 10))
+        n, box = self.size, self.geo.box
+        def pattern(r, c): return (box * (r % box) + r // box + c) % n
+        nums = list(range(1, n + 1))
         random.shuffle(nums)
-        return [[nums[pattern(r, c)] for c in range(9)] for r in range(9)]
+        return [[nums[pattern(r, c)] for c in range(n)] for r in range(n)]
 
     def shuffle_board(self, board):
-        # Shuffle rows within 3x3 blocks
-        for i in range(0, 9, 3):
-            block = board[i:i+3]
+        n, box = self.size, self.geo.box
+        # Shuffle rows within box-high blocks
+        for i in range(0, n, box):
+            block = board[i:i+box]
             random.shuffle(block)
-            board[i:i+3] = block
+            board[i:i+box] = block
             
-        # Shuffle the 3x3 blocks themselves 
-        block_indices = [0, 3, 6]
+        # Shuffle the blocks themselves 
+        block_indices = list(range(0, n, box))
         random.shuffle(block_indices)
         new_board = []
         for idx in block_indices:
-            new_board.extend(board[idx:idx+3])
+            new_board.extend(board[idx:idx+box])
         
         # Transpose and repeat for columns...
         return new_board
 
     def is_valid(self, board, row, col, num):
-        for i in range(9):
-            if board[row][i] == num and i != col: return False
-            if board[i][col] == num and i != row: return False
-        br, bc = 3 * (row // 3), 3 * (col // 3)
-        for i in range(br, br + 3):
-            for j in range(bc, bc + 3):
-                if board[i][j] == num and (i, j) != (row, col): return False
-        return True
+        return num not in self.geo.peer_values[row * self.size + col](board.cells)
 
     def get_candidates(self, board, row, col):
-        if board[row][col] != 0: return set()
-        candidates = set(range(1, 10))
-        candidates -= set(board[row])
-        candidates -= {board[i][col] for i in range(9)}
-        br, bc = 3 * (row // 3), 3 * (col // 3)
-        for i in range(br, br + 3):
-            for j in range(bc, bc + 3):
-                candidates.discard(board[i][j])
-        return candidates
+        return get_candidates(board, row, col)
 
     # -------------------------------------------------------------------------
     #  DIVIDE AND CONQUER SOLVER
     # -------------------------------------------------------------------------
     
     # FIX: Split into two methods to avoid mutating input
-    def solve_dnc(self, board_snapshot):
-        # Create a working copy to avoid mutating the input
-        board = copy.deepcopy(board_snapshot)
-        return self._solve_dnc_helper(board)
+    def solve_dnc(self, board_snapshot, check=None, stats=None):
+        return SOLUTIONS.solve(board_snapshot, lambda board: solve_dnc(board, check, stats))
+
+    def new_search_stats(self):
+        # A SearchStats for the next search, or None while stats are off
+        return SearchStats() if self.stats_var.get() else None
+
+    def show_search_stats(self, label, stats):
+        if stats is None:
+            return
+        text = stats.summary() if stats.nodes else "answered from the solution cache"
+        self.stats_label.config(text=f"{label}: {text}")
     
     def _solve_dnc_helper(self, board):
-        # 1. PIVOT (Find MRV)
-        best_cell = None
-        best_candidates = None
-        min_candidates_count = 10 
-        
-        for r in range(9):
-            for c in range(9):
-                if board[r][c] == 0:
-                    candidates = self.get_candidates(board, r, c)
-                    count = len(candidates)
-                    if count == 0: return None # Dead end
-                    
-                    if count < min_candidates_count:
-                        min_candidates_count = count
-                        best_cell = (r, c)
-                        best_candidates = candidates  # FIX: Store candidates to avoid recalculating
-                        if count == 1: break 
-            if min_candidates_count == 1: break
-
-        # 2. BASE CASE
-        if best_cell is None:
-            return board
-
-        # 3. DIVIDE & CONQUER
-        row, col = best_cell
-        
-        for val in best_candidates:
-            board[row][col] = val 
-            result = self._solve_dnc_helper(board)
-            if result is not None:
-                return result
-            board[row][col] = 0 # Backtrack
-            
-        return None
+        return _solve_dnc_helper(board)
 
     def initialize_priority_queue(self):
-        self.pq = []
-        self.pq_entries = set()  # FIX: Reset tracking set
-        for i in range(9):
-            for j in range(9):
+        self.pq.clear()
+        n = self.size
+        for i in range(n):
+            for j in range(n):
                 if self.board[i][j] == 0:
                     c = self.get_candidates(self.board, i, j)
-                    if c:
-                        heapq.heappush(self.pq, (len(c), i, j))
-                        self.pq_entries.add((i, j))  # FIX: Track entry
+                    self.pq.update(i * n + j, len(c))
 
     def update_neighbors(self, row, col):
-        neighbours = set()
-        for i in range(9):
-            neighbours.add((row, i))
-            neighbours.add((i, col))
-        br, bc = 3 * (row // 3), 3 * (col // 3)
-        for i in range(br, br + 3):
-            for j in range(bc, bc + 3):
-                neighbours.add((i, j))
-        
-        for r, c in neighbours:
-            if self.board[r][c] == 0:
-                cand = self.get_candidates(self.board, r, c)
-                if cand:
-                    # FIX: Only add if not already in queue (avoid duplicates)
-                    if (r, c) not in self.pq_entries:
-                        heapq.heappush(self.pq, (len(cand), r, c))
-                        self.pq_entries.add((r, c))
-
-    def ai_make_move(self):
-        # Sync PQ just in case
-        while self.pq and self.board[self.pq[0][1]][self.pq[0][2]] != 0:
-            _, r, c = heapq.heappop(self.pq)
-            self.pq_entries.discard((r, c))  # FIX: Remove from tracking
-            
+        # Re-rank (row, col) and its peers after that cell was filled or cleared
+        cells = self.board.cells
+        cell = row * self.size + col
+        for i in (cell,) + self.geo.peers[cell]:
+            if cells[i] == 0:
+                r, c = divmod(i, self.size)
+                self.pq.update(i, len(self.get_candidates(self.board, r, c)))
+            else:
+                self.pq.discard(i)
+
+    def ai_make_move(self, on_done):
+        # Picks the target on the Tk thread, runs the D&C solver on a worker
+        # thread, then calls on_done(moved) back on the Tk thread.
+
         if not self.pq:
             # Try to rebuild if empty but board not full (safety net)
             if not self.is_complete():
                 self.initialize_priority_queue()
-                if not self.pq: return False
+                if not self.pq:
+                    on_done(False)
+                    return
             else:
-                return False
+                on_done(False)
+                return
 
-        # Get Target
-        _, row, col = heapq.heappop(self.pq)
-        self.pq_entries.discard((row, col))  # FIX: Remove from tracking
-        
-        # Run D&C Solver
-        solved_board = self.solve_dnc(self.board)
+        # Get Target (it stays queued until the move lands)
+        row, col = divmod(self.pq.peek()[0], self.size)
+
+        # Cached solution still agrees with the board: no search needed
+        if self.solution_cache is not None:
+            if self.stats_var.get():
+                self.stats_label.config(text="AI: solution still valid, no search")
+            self._ai_apply_move(row, col, self.solution_cache, on_done)
+            return
         
+        # Run D&C Solver (off the Tk thread, on a snapshot)
+        snapshot = self.board.copy()
+        stats = self.new_search_stats()
+        self.ai_task = AITask(self.root,
+                              lambda check: self.solve_dnc(snapshot, check, stats),
+                              lambda solved: self._ai_search_done(row, col, solved, on_done, stats),
+                              on_timeout=self._ai_timed_out,
+                              on_error=self._ai_failed,
+                              timeout=self.AI_TIMEOUT).start()
+
+    def _ai_search_done(self, row, col, solved_board, on_done, stats):
+        self.show_search_stats("AI", stats)
+        self._ai_apply_move(row, col, solved_board, on_done)
+
+    def _ai_apply_move(self, row, col, solved_board, on_done):
+        self.ai_task = None
+        self.solution_cache = solved_board
         if solved_board:
             correct_val = solved_board[row][col]
             self.board[row][col] = correct_val
             
             # UI Update
-            self.cells[row][col].config(state="normal")
-            self.cells[row][col].delete(0, tk.END)
-            self.cells[row][col].insert(0, str(correct_val))
-            self.cells[row][col].config(fg="red", state="disabled")
+            self.view.set(row, col, symbol(correct_val), fg="red", locked=True)
             
             self.update_neighbors(row, col)
-            return True
+            on_done(True)
         else:
-            return False
+            on_done(False)
+
+    def _ai_timed_out(self):
+        self.ai_task = None
+        self.current_turn = "user"
+        self.status_label.config(text="User's Turn")
+        messagebox.showinfo("AI", "The AI ran out of time on this position. Your move!")
+
+    def _ai_failed(self, error):
+        # The search raised: hand the turn back so later AI turns still run,
+        # then let Tk report the error
+        self.ai_task = None
+        self.current_turn = "user"
+        self.status_label.config(text="User's Turn")
+        raise error
+
+    def cancel_ai(self):
+        # Drop any in-flight AI search (Reset / New Game)
+        if self.ai_task is not None:
+            self.ai_task.cancel()
+            self.ai_task = None
 
     def on_cell_edit(self, row, col):
         # FIX: Check game_over flag
         if self.game_over or self.current_turn != "user" or self.initial_board[row][col] != 0:
             return
-        cell = self.cells[row][col]
-        v = cell.get().strip()
+        v = self.view.get(row, col).strip()
         if v == "":
             self.board[row][col] = 0
+            self.update_neighbors(row, col)
             return
         try:
-            num = int(v)
-            if not (1 <= num <= 9): raise ValueError
+            num = parse_symbol(v, self.size)
             
             # STRICT MODE FIX: Use .get() directly
             if self.strict_var.get():
                 if num != self.solution_board[row][col]:
                     messagebox.showerror("Incorrect", "Strict Mode: That is not the correct value.")
-                    cell.delete(0, tk.END)
+                    self.view.set(row, col, "")
                     self.board[row][col] = 0
+                    self.update_neighbors(row, col)
                     return
 
             if self.is_valid(self.board, row, col, num):
                 self.board[row][col] = num
-                self.pq_entries.discard((row, col))  # FIX: Remove from tracking
                 self.update_neighbors(row, col)
-                cell.config(fg="blue")
+                self.view.set(row, col, fg="blue")
                 
                 # CHECK WIN IMMEDIATELY (Fix #1)
                 if self.is_complete():
@@ -310,13 +421,54 @@ class SudokuDuel:
                     return
 
                 self.current_turn = "ai"
+                if self.solution_cache is not None and self.solution_cache[row][col] != num:
+                    # Legal but off the cached solution: re-solve now so an
+                    # unsolvable move is flagged before the AI ever plays
+                    self.check_divergent_move(row, col)
+                    return
+
                 self.status_label.config(text="AI is Thinking...")
-                self.root.after(300, self.ai_turn)
+                self.root.after(self.AI_DELAY_MS, self.ai_turn)
             else:
-                cell.delete(0, tk.END)
+                self.view.set(row, col, "")
                 self.board[row][col] = 0
+                self.update_neighbors(row, col)
         except ValueError:
-            cell.delete(0, tk.END)
+            self.view.set(row, col, "")
+
+    def check_divergent_move(self, row, col):
+        self.solution_cache = None
+        self.status_label.config(text="Checking your move...")
+        snapshot = self.board.copy()
+        stats = self.new_search_stats()
+        self.ai_task = AITask(self.root,
+                              lambda check: self.solve_dnc(snapshot, check, stats),
+                              lambda solved: self._divergent_move_checked(row, col, solved, stats),
+                              on_timeout=self._divergent_move_timed_out,
+                              on_error=self._ai_failed,
+                              timeout=self.AI_TIMEOUT).start()
+
+    def _divergent_move_checked(self, row, col, solved_board, stats=None):
+        self.ai_task = None
+        self.show_search_stats("Move check", stats)
+        if solved_board is None:
+            # Take the move back and let the user try again
+            self.board[row][col] = 0
+            self.view.set(row, col, "")
+            self.update_neighbors(row, col)
+            self.current_turn = "user"
+            self.status_label.config(text="User's Turn")
+            messagebox.showwarning("Unsolvable", "That move leaves the puzzle unsolvable. Try another value.")
+            return
+        self.solution_cache = solved_board
+        self.status_label.config(text="AI is Thinking...")
+        self.root.after(self.AI_DELAY_MS, self.ai_turn)
+
+    def _divergent_move_timed_out(self):
+        # Couldn't decide in time; the AI will re-solve on its turn
+        self.ai_task = None
+        self.status_label.config(text="AI is Thinking...")
+        self.root.after(self.AI_DELAY_MS, self.ai_turn)
 
     def ai_play_button(self):
         if self.game_over:  # FIX: Check game_over
@@ -326,10 +478,14 @@ class SudokuDuel:
         self.ai_turn()
 
     def ai_turn(self):
-        if self.game_over:  # FIX: Check game_over
+        if self.game_over or self.ai_task is not None:  # FIX: Check game_over
             return
+        self.current_turn = "ai"
         # Try to make a move
-        if not self.ai_make_move():
+        self.ai_make_move(self._ai_turn_done)
+
+    def _ai_turn_done(self, moved):
+        if not moved:
             # If move failed, check if it's because board is full or error
             if self.is_complete():
                 self.game_over = True  # FIX: Set game over
@@ -349,73 +505,102 @@ class SudokuDuel:
         self.status_label.config(text="User's Turn")
 
     def is_complete(self):
-        return all(self.board[i][j] != 0 for i in range(9) for j in range(9))
+        return all(self.board.cells)
 
     def new_game(self):
+        self.cancel_ai()
+        if self.puzzle_task is not None:
+            self.puzzle_task.cancel()
+            self.puzzle_task = None
+        item = self.puzzles.take(self.difficulty)
+        if item is not None:
+            self._start_game(item)
+            return
+
+        # Nothing prefetched for this difficulty yet. Generating can take a
+        # few hundred ms (Hard retries fresh grids until one needs search),
+        # so it runs off the Tk thread on an empty, locked board.
+        difficulty = self.difficulty
+        self.game_over = True
+        self.board = Board(size=self.size)
+        self.initial_board = self.board.copy()
+        self.solution_cache = None
+        self.current_turn = "user"
+        self.pq.clear()
+        self.render_board()
+        self.view.lock_all()
+        self.status_label.config(text=f"Generating a {difficulty} puzzle...")
+        self.puzzle_task = AITask(self.root, lambda check: self.make_puzzle(difficulty),
+                                  self._start_game, on_error=self._puzzle_failed).start()
+
+    def _start_game(self, item):
+        self.puzzle_task = None
+        self.board, self.solution_board = item
         self.game_over = False  # FIX: Reset game over flag
-        self.board = self.generate_puzzle()
-        self.initial_board = copy.deepcopy(self.board)
+        self.initial_board = self.board.copy()
+        self.solution_cache = self.solution_board.copy()
         self.current_turn = "user"
         self.initialize_priority_queue()
         self.render_board()
         self.status_label.config(text=f"User's Turn {self.difficulty}")
 
+    def _puzzle_failed(self, error):
+        self.puzzle_task = None
+        self.status_label.config(text="Could not generate a puzzle; try New Game")
+        raise error
+
     def render_board(self):
-        for i in range(9):
-            for j in range(9):
-                cell = self.cells[i][j]
-                cell.config(state="normal")
-                cell.delete(0, tk.END)
-                if self.board[i][j] != 0:
-                    cell.insert(0, str(self.board[i][j]))
-                    if self.initial_board[i][j] != 0:
-                        cell.config(fg="black", state="disabled")
-                    else:
-                        cell.config(fg="blue")
-                else:
-                    cell.config(bg="white")
+        self.view.render(self.board, self.initial_board)
 
     def show_hint(self):
         if self.game_over:  # FIX: Check game_over
             return
-        self.initialize_priority_queue()
-
-        while self.pq and self.board[self.pq[0][1]][self.pq[0][2]] != 0:
-            heapq.heappop(self.pq)
-
         if not self.pq:
             messagebox.showinfo("Hint", "No empty cells remaining!")
             return
 
-        _, row, col = self.pq[0]
+        row, col = divmod(self.pq.peek()[0], self.size)
 
-        for i in range(9):
-            for j in range(9):
-                cell = self.cells[i][j]
-                prev_state = cell.cget("state")
-                cell.config(state="normal", bg="white")
-                cell.config(state=prev_state)
-
-        hint_cell = self.cells[row][col]
-        prev_state = hint_cell.cget("state")
-        hint_cell.config(state="normal", bg="#ffeb3b")
-        hint_cell.config(state=prev_state)
+        self.view.highlight(row, col)
 
         cand = sorted(self.get_candidates(self.board, row, col))
+        if self.size > 9:
+            cand = [symbol(v) for v in cand] # digits past 9 show as letters
 
         messagebox.showinfo("Hint",f"Divide & Conquer Target:\n"f"Row {row + 1}, Col {col + 1}\n"f"Valid Options: {cand}")
 
 
 
     def reset_board(self):
+        if self.puzzle_task is not None:
+            return # no puzzle yet
+        self.cancel_ai()
         self.game_over = False  # FIX: Reset game over flag
-        self.board = copy.deepcopy(self.initial_board)
+        self.board = self.initial_board.copy()
+        self.solution_cache = self.solution_board.copy()
         self.current_turn = "user"
         self.initialize_priority_queue()
         self.render_board()
         self.status_label.config(text="User's Turn")
 
+    def on_close(self):
+        # Persist unused prefetched puzzles for the next session
+        self.puzzles.stop()
+        self.root.destroy()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sudoku duel against the Divide & Conquer AI.")
+    parser.add_argument("--size", type=int, choices=SIZES, default=9, help="grid size n (n x n board)")
+    parser.add_argument("--library", help="packed 9x9 puzzle library to draw puzzles from (sudoku_library.py)")
+    args = parser.parse_args()
+    library = None
+    if args.library:
+        if args.size != 9:
+            parser.error("puzzle libraries hold 9x9 puzzles only")
+        try:
+            library = PuzzleLibrary(args.library)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
     root = tk.Tk()
-    SudokuDuel(root)
+    SudokuDuel(root, args.size, library)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,338 @@
+# Headless batch solver.
+#
+# Reads a file with one puzzle per line (81 characters, digits 1-9 for clues and
+# '0' or '.' for empty cells; 256 or 625 characters for 16x16 / 25x25 grids,
+# with digits past 9 written A-P), fans the puzzles out over a process pool
+# sized to the machine, and writes one result line per puzzle:
+#
+#     <puzzle>\t<solution or "unsolvable">\t<elapsed ms>
+#
+# With --stats each line gets a fourth column of search counters
+# (nodes=... backtracks=... max_depth=..., see sudoku_stats.py), and the
+# puzzles that took the most nodes are listed at the end.
+#
+# Usage:
+#     python sudoku_batch.py puzzles.txt -o solutions.txt --engine dp
+#
+# Input is read and output written a line at a time, so memory stays flat
+# however large the puzzle file is. With -o, every CHECKPOINT_EVERY puzzles
+# (and on exit, including Ctrl-C) the run records in <output>.offset how far
+# it got: the byte offset of the next unsolved input line and the size of
+# the output written so far. --resume picks up from there, dropping any
+# output past the checkpoint; --start begins at any input byte offset.
+#
+# Engines:
+#     dp   - BitmaskSolver from sudoku_dp.py
+#     dnc  - Divide & Conquer solver from "sudoku divid and conquer.py"
+#     dlx  - Dancing Links exact-cover solver from sudoku_dlx.py (9x9 only)
+#     iter - explicit-stack (non-recursive) search from sudoku_search.py
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+from sudoku_board import SYMBOLS, Board, size_for
+from sudoku_logic import geometry
+from sudoku_stats import SearchStats
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_EVERY = 1000 # puzzles between checkpoints of a run writing to a file
+
+
+# --------------------------------------------------
+# Puzzle text format
+# --------------------------------------------------
+
+def parse_puzzle(line):
+    """Parse an 81-character (or 256/625-character) puzzle line into a Board (0 = empty)."""
+    line = line.strip()
+    try:
+        n = size_for(len(line))
+    except ValueError:
+        raise ValueError(f"expected 81 cells, got {len(line)}") from None
+    allowed = "." + SYMBOLS[:n + 1]
+    for ch in line:
+        if ch.upper() not in allowed:
+            raise ValueError(f"invalid cell character {ch!r}")
+    board = Board.from_line(line)
+    conflict = find_conflict(board)
+    if conflict is not None:
+        r, c = divmod(conflict, n)
+        raise ValueError(f"conflicting clue at row {r + 1}, column {c + 1}")
+    return board
+
+
+def find_conflict(board):
+    """Flat index of the first clue that repeats a digit of its row, column or box, or None."""
+    geo = geometry(board.size)
+    rows, cols, boxes = [0] * geo.size, [0] * geo.size, [0] * geo.size
+    for i, v in enumerate(board.cells):
+        if v:
+            mask = 1 << (v - 1)
+            r, c, b = geo.cell_row[i], geo.cell_col[i], geo.cell_box[i]
+            if (rows[r] | cols[c] | boxes[b]) & mask:
+                return i
+            rows[r] |= mask
+            cols[c] |= mask
+            boxes[b] |= mask
+    return None
+
+
+def format_board(board):
+    """Inverse of parse_puzzle: flatten a Board into a puzzle line."""
+    return board.to_line()
+
+
+def read_puzzles(path):
+    """Yield puzzle lines from a file, skipping blank lines and '#' comments."""
+    for line, _ in read_puzzles_from(path):
+        yield line
+
+
+def read_puzzles_from(path, start=0):
+    """
+    Yield (line, end) for the puzzle lines of a file from byte `start` on.
+
+    `end` is the byte offset just past the line, i.e. where a run that has
+    handled this puzzle resumes. The file is read through a buffered binary
+    stream one line at a time, so memory use does not grow with its size.
+    A `start` inside a line skips ahead to the next one.
+    """
+    with open(path, "rb") as f:
+        pos = start
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                pos += len(f.readline())
+        for raw in f:
+            pos += len(raw)
+            line = raw.strip()
+            if line and not line.startswith(b"#"):
+                yield line.decode("ascii"), pos
+
+
+# --------------------------------------------------
+# Engines
+# --------------------------------------------------
+
+def _load_dnc_module():
+    # The D&C app's filename contains spaces, so it can't be imported by name.
+    path = os.path.join(HERE, "sudoku divid and conquer.py")
+    spec = importlib.util.spec_from_file_location("sudoku_dnc", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _dp_engine():
+    from sudoku_dp import BitmaskSolver
+    return lambda board, stats=None: BitmaskSolver(stats=stats, size=board.size).solve(board)
+
+
+def _dnc_engine():
+    solve_dnc = _load_dnc_module().solve_dnc
+    return lambda board, stats=None: solve_dnc(board, stats=stats)
+
+
+def _dlx_engine():
+    from sudoku_dlx import DLXSolver
+    return lambda board, stats=None: DLXSolver(stats=stats).solve(board)
+
+
+def _iter_engine():
+    from sudoku_search import ResumableSearch
+
+    def solve(board, stats=None):
+        search = ResumableSearch(board, stats=stats)
+        search.run()
+        return search.solution
+    return solve
+
+
+# Engine name -> loader returning a solve(board, stats=None) callable. Loaders
+# run once per process so module imports are not charged to the first
+# puzzle's timing.
+ENGINES = {
+    "dp": _dp_engine,
+    "dnc": _dnc_engine,
+    "dlx": _dlx_engine,
+    "iter": _iter_engine,
+}
+
+_loaded_engines = {}
+
+def get_engine(name):
+    if name not in _loaded_engines:
+        _loaded_engines[name] = ENGINES[name]()
+    return _loaded_engines[name]
+
+
+# --------------------------------------------------
+# Workers
+# --------------------------------------------------
+
+def _solve_line(job):
+    # Runs inside a pool worker: must be a top-level function so it pickles.
+    engine, line, with_stats = job
+    try:
+        board = parse_puzzle(line)
+    except ValueError as e:
+        return line, f"error: {e}", 0.0, None
+
+    solve = get_engine(engine)
+    stats = SearchStats() if with_stats else None
+    start = time.perf_counter()
+    try:
+        solved = solve(board, stats)
+    except ValueError as e: # grid size the engine doesn't handle
+        return line, f"error: {e}", 0.0, None
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+    solution = format_board(solved) if solved else "unsolvable"
+    return line, solution, elapsed_ms, stats
+
+
+def solve_batch(lines, engine="dp", workers=None, chunksize=64, stats=False):
+    """
+    Solve an iterable of puzzle lines across a process pool.
+
+    Yields (puzzle, solution, elapsed_ms, stats) tuples in input order.
+    `solution` is a puzzle line as long as the input, "unsolvable", or
+    "error: ..." for lines that could not be parsed or solved by `engine`. `stats` is the puzzle's SearchStats if
+    `stats` is true, otherwise None.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}")
+    workers = workers or os.cpu_count() or 1
+    jobs = ((engine, line, stats) for line in lines)
+
+    if workers == 1:
+        # Skip the pool entirely; avoids fork + pickling overhead.
+        for job in jobs:
+            yield _solve_line(job)
+        return
+
+    with Pool(processes=workers) as pool:
+        yield from pool.imap(_solve_line, jobs, chunksize=chunksize)
+
+
+# --------------------------------------------------
+# Checkpoints
+# --------------------------------------------------
+
+def checkpoint_path(output):
+    return output + ".offset"
+
+
+def read_checkpoint(output):
+    """(input byte offset, output size) recorded for `output`, or (0, 0) if there is none."""
+    try:
+        with open(checkpoint_path(output), "r", encoding="ascii") as f:
+            start, size = f.read().split()
+    except FileNotFoundError:
+        return 0, 0
+    return int(start), int(size)
+
+
+def write_checkpoint(output, start, size):
+    # Written aside and renamed, so a crash mid-write keeps the previous one
+    path = checkpoint_path(output)
+    with open(path + ".tmp", "w", encoding="ascii") as f:
+        f.write(f"{start} {size}\n")
+    os.replace(path + ".tmp", path)
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Sudoku puzzles in bulk without the GUI.")
+    parser.add_argument("input", help="file with one puzzle per line (81, 256 or 625 characters)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("-e", "--engine", choices=sorted(ENGINES), default="dp")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: number of cores)")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="puzzles handed to a worker at a time")
+    parser.add_argument("--stats", action="store_true",
+                        help="add search counters to each line and list the costliest puzzles")
+    parser.add_argument("--start", type=int, default=0, metavar="OFFSET",
+                        help="input byte offset to start at")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from <output>.offset (needs -o)")
+    args = parser.parse_args(argv)
+    if args.resume and not args.output:
+        parser.error("--resume needs -o/--output")
+
+    position = args.start
+    if args.resume:
+        position, size = read_checkpoint(args.output)
+        if os.path.exists(args.output):
+            with open(args.output, "r+b") as f:
+                f.truncate(size)
+        out = open(args.output, "a", encoding="ascii")
+    else:
+        out = open(args.output, "w", encoding="ascii") if args.output else sys.stdout
+
+    # End offsets of the puzzles handed to the pool and not written yet.
+    # Results come back in input order, so each one pops its own offset.
+    pending = deque()
+
+    def lines():
+        for line, end in read_puzzles_from(args.input, position):
+            pending.append(end)
+            yield line
+
+    solved = failed = 0
+    total_ms = 0.0
+    costliest = [] # (nodes, elapsed_ms, puzzle), top 5
+    interrupted = False
+    start = time.perf_counter()
+    try:
+        for puzzle, solution, elapsed_ms, stats in solve_batch(lines(), args.engine,
+                                                               args.workers, args.chunksize,
+                                                               args.stats):
+            position = pending.popleft()
+            if stats is not None:
+                out.write(f"{puzzle}\t{solution}\t{elapsed_ms:.3f}\t{stats.summary()}\n")
+                costliest = sorted(costliest + [(stats.nodes, elapsed_ms, puzzle)], reverse=True)[:5]
+            else:
+                out.write(f"{puzzle}\t{solution}\t{elapsed_ms:.3f}\n")
+            total_ms += elapsed_ms
+            if solution != "unsolvable" and not solution.startswith("error"):
+                solved += 1
+            else:
+                failed += 1
+            if args.output and (solved + failed) % CHECKPOINT_EVERY == 0:
+                out.flush()
+                write_checkpoint(args.output, position, out.tell())
+    except KeyboardInterrupt:
+        interrupted = True
+    finally:
+        if out is not sys.stdout:
+            out.flush()
+            write_checkpoint(args.output, position, out.tell())
+            out.close()
+
+    wall = time.perf_counter() - start
+    count = solved + failed
+    print(f"{count} puzzles ({solved} solved, {failed} failed) in {wall:.2f}s wall, "
+          f"{total_ms / max(count, 1):.3f} ms/puzzle solve time", file=sys.stderr)
+    if costliest:
+        print("most nodes:", file=sys.stderr)
+        for nodes, elapsed_ms, puzzle in costliest:
+            print(f"  {puzzle}  {nodes} nodes  {elapsed_ms:.3f} ms", file=sys.stderr)
+    if interrupted:
+        resume = "--resume" if args.output else f"--start {position}"
+        print(f"interrupted at input byte {position}; rerun with {resume} to continue", file=sys.stderr)
+        return 130
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
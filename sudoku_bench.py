@@ -0,0 +1,266 @@
+# Solver benchmark over the bundled puzzle corpus.
+#
+# Runs every engine over every corpus file in corpus/ (one puzzle per line,
+# '#' comments allowed; 16x16.txt and 25x25.txt hold the stress-size grids)
+# and reports, per engine and corpus:
+#
+#     solved / failed   - failed = no solution, or a wrong one
+#     wall time         - total, mean, median and max per puzzle (best of --repeat)
+#     nodes             - search nodes visited (greedy: moves played)
+#     probes            - greedy only: lookahead positions tested before its
+#                         moves, kept out of nodes so that column compares
+#     backtracks        - nodes that turned out to be dead ends
+#     max depth         - deepest search node
+#     peak memory       - tracemalloc peak of the worst puzzle, in KiB
+#
+# Counters and memory are measured in separate passes, since SearchStats and
+# tracemalloc both slow the solvers down. Results can be saved as JSON and compared against an earlier run:
+#
+#     python sudoku_bench.py -o before.json
+#     ... change a solver ...
+#     python sudoku_bench.py --baseline before.json
+#
+# Engines:
+#     greedy - the greedy AI from sudoku_duel.py (no backtracking, may fail)
+#     dnc    - Divide & Conquer solver from "sudoku divid and conquer.py"
+#     dp     - BitmaskSolver from sudoku_dp.py
+#     dlx    - Dancing Links exact-cover solver from sudoku_dlx.py (9x9 only,
+#              skipped on other corpora)
+#     iter   - explicit-stack search from sudoku_search.py
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from sudoku_batch import HERE, parse_puzzle, read_puzzles
+from sudoku_logic import SIZES
+from sudoku_stats import SearchStats
+
+CORPUS_DIR = os.path.join(HERE, "corpus")
+SEED = 12345 # greedy picks digits at random; every puzzle starts from this seed
+
+
+# --------------------------------------------------
+# Engines
+# --------------------------------------------------
+# Each loader returns run(board, stats=None) -> solution or None. Search
+# engines are the batch ones, counting into a SearchStats; greedy counts its
+# moves as nodes, its lookahead as probes, and never backtracks.
+
+def _greedy_engine():
+    import sudoku_duel
+
+    def run(board, stats=None):
+        random.seed(SEED)
+        return sudoku_duel.solve_greedy(board, stats=stats)
+    return run
+
+
+def _batch_engine(name):
+    from sudoku_batch import ENGINES as BATCH_ENGINES
+    return lambda: BATCH_ENGINES[name]()
+
+
+ENGINES = {
+    "greedy": _greedy_engine,
+    "dnc": _batch_engine("dnc"),
+    "dp": _batch_engine("dp"),
+    "dlx": _batch_engine("dlx"),
+    "iter": _batch_engine("iter"),
+}
+
+# Grid sizes an engine can run (default: all of sudoku_logic.SIZES)
+ENGINE_SIZES = {"dlx": (9,)}
+
+
+# --------------------------------------------------
+# Measurement
+# --------------------------------------------------
+
+def is_solution(puzzle, solved):
+    """True if `solved` is a complete, valid grid that keeps every clue of `puzzle`."""
+    if solved is None:
+        return False
+    cells = solved.cells
+    if solved.size != puzzle.size or any(p and p != v for p, v in zip(puzzle.cells, cells)):
+        return False
+    digits = set(range(1, puzzle.size + 1))
+    for i in range(puzzle.size):
+        if set(solved.row(i)) != digits or set(solved.col(i)) != digits or set(solved.box(i)) != digits:
+            return False
+    return True
+
+
+def load_corpus(names=None):
+    """{corpus name: [Board, ...]} for corpus/<name>.txt (all files if `names` is None)."""
+    if names is None:
+        names = sorted(f[:-4] for f in os.listdir(CORPUS_DIR) if f.endswith(".txt"))
+    return {name: [parse_puzzle(line) for line in read_puzzles(os.path.join(CORPUS_DIR, name + ".txt"))]
+            for name in names}
+
+
+def bench(engine, puzzles, repeat=3, memory=True):
+    """
+    Run one engine over a list of puzzles.
+
+    Returns:
+        dict: counts, timings (ms), search counters and peak_kib for the set.
+    """
+    run = ENGINES[engine]()
+    times = []
+    solved = 0
+    for puzzle in puzzles:
+        best = None
+        for _ in range(repeat):
+            board = puzzle.copy() # some solvers fill the board they are given
+            start = time.perf_counter()
+            result = run(board)
+            elapsed = (time.perf_counter() - start) * 1000.0
+            best = elapsed if best is None else min(best, elapsed)
+        times.append(best)
+        if is_solution(puzzle, result):
+            solved += 1
+
+    # Counters come from their own pass so they don't slow the timed runs
+    stats = SearchStats()
+    for puzzle in puzzles:
+        run(puzzle.copy(), stats)
+
+    peak = 0
+    if memory:
+        tracemalloc.start()
+        try:
+            for puzzle in puzzles:
+                board = puzzle.copy()
+                tracemalloc.reset_peak()
+                run(board)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    count = len(puzzles)
+    return {
+        "puzzles": count,
+        "solved": solved,
+        "failed": count - solved,
+        "solve_rate": solved / count if count else 0.0,
+        "total_ms": sum(times),
+        "mean_ms": statistics.fmean(times) if times else 0.0,
+        "median_ms": statistics.median(times) if times else 0.0,
+        "max_ms": max(times, default=0.0),
+        "nodes": stats.nodes,
+        "backtracks": stats.backtracks,
+        "max_depth": stats.max_depth,
+        "probes": stats.probes,
+        "peak_kib": peak / 1024.0,
+    }
+
+
+# --------------------------------------------------
+# Reporting
+# --------------------------------------------------
+
+def format_table(results):
+    header = f"{'engine':<8}{'corpus':<10}{'solved':>9}{'total ms':>11}{'mean ms':>10}" \
+             f"{'median ms':>11}{'max ms':>10}{'nodes':>10}{'backtracks':>12}{'depth':>7}{'probes':>9}{'peak KiB':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r['engine']:<8}{r['corpus']:<10}{r['solved']:>5}/{r['puzzles']:<3}"
+                     f"{r['total_ms']:>11.1f}{r['mean_ms']:>10.2f}{r['median_ms']:>11.2f}"
+                     f"{r['max_ms']:>10.2f}{r['nodes']:>10}{r['backtracks']:>12}{r['max_depth']:>7}{r.get('probes', 0):>9}"
+                     f"{r['peak_kib']:>10.1f}")
+    return "\n".join(lines)
+
+
+def compare(results, baseline, threshold=0.10):
+    """
+    Compare a run against a baseline run (both as saved by main()).
+
+    Returns:
+        tuple[list[str], bool]: report lines, and whether any engine/corpus
+        got slower by more than `threshold` (on total time) or solved fewer
+        puzzles.
+    """
+    old = {(r["engine"], r["corpus"]): r for r in baseline["results"]}
+    lines = []
+    regressed = False
+    for r in results:
+        before = old.get((r["engine"], r["corpus"]))
+        if before is None:
+            continue
+        ratio = r["total_ms"] / before["total_ms"] if before["total_ms"] else 1.0
+        note = ""
+        if ratio > 1.0 + threshold:
+            note = "  SLOWER"
+            regressed = True
+        if r["solved"] < before["solved"]:
+            note += "  FEWER SOLVED"
+            regressed = True
+        lines.append(f"{r['engine']:<8}{r['corpus']:<10}{before['total_ms']:>11.1f} -> {r['total_ms']:>9.1f} ms"
+                     f"  x{ratio:.2f}  nodes {before['nodes']} -> {r['nodes']}{note}")
+    return lines, regressed
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solvers over the bundled corpus.")
+    parser.add_argument("-e", "--engine", action="append", choices=list(ENGINES),
+                        help="engine to run (repeatable; default: all)")
+    parser.add_argument("-c", "--corpus", action="append",
+                        help="corpus/<name>.txt to run (repeatable; default: all)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per puzzle; the fastest one counts")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", help="save results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown reported as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    results = []
+    for engine in args.engine or list(ENGINES):
+        for name, puzzles in corpus.items():
+            if puzzles and puzzles[0].size not in ENGINE_SIZES.get(engine, SIZES):
+                continue
+            stats = bench(engine, puzzles, args.repeat, not args.no_memory)
+            results.append({"engine": engine, "corpus": name, **stats})
+            print(f"{engine}/{name}: {stats['solved']}/{stats['puzzles']} solved, "
+                  f"{stats['total_ms']:.1f} ms", file=sys.stderr)
+
+    print(format_table(results))
+
+    if args.output:
+        data = {
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "repeat": args.repeat,
+            "seed": SEED,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressed = compare(results, baseline, args.threshold)
+        print()
+        print(f"vs {args.baseline} (threshold {args.threshold:.0%}):")
+        print("\n".join(lines) if lines else "no engine/corpus pairs in common")
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# Compact board representation.
+#
+# A Board keeps its n * n cells in one bytearray, row-major (flat index
+# i = r * n + c, 0 = empty). Copying a board is a single bytearray copy
+# instead of copy.deepcopy over nested lists, and a 9x9 board's payload is
+# 81 bytes. board[r][c] still reads and writes through per-row memoryviews, so
+# GUI code keeps its 2-D indexing; solvers work on `board.cells` directly
+# with flat indices.
+#
+# Sizes are 4, 9, 16 and 25 (sudoku_logic.SIZES); the size is implied by the
+# number of cells. In puzzle lines, digits 10-25 are written A-P, so every
+# cell is one character ('0' or '.' = empty):
+#
+#     16x16: 1-9 then A (10) ... G (16)
+
+from math import isqrt
+
+from sudoku_logic import SIZES
+
+SYMBOLS = "0123456789ABCDEFGHIJKLMNOP"
+
+_FROM_ASCII = bytes.maketrans(SYMBOLS.encode("ascii") + SYMBOLS[10:].lower().encode("ascii") + b".",
+                              bytes(range(len(SYMBOLS))) + bytes(range(10, len(SYMBOLS))) + b"\x00")
+_TO_ASCII = bytes.maketrans(bytes(range(len(SYMBOLS))), SYMBOLS.encode("ascii"))
+
+
+def size_for(ncells):
+    """Grid size n of a board with `ncells` cells; ValueError if there is none."""
+    n = isqrt(ncells)
+    if n * n != ncells or n not in SIZES:
+        raise ValueError(f"expected 81 cells (or 16, 256, 625), got {ncells}")
+    return n
+
+
+def symbol(v):
+    """Single-character symbol for a cell value ('' for empty)."""
+    return SYMBOLS[v] if v else ""
+
+
+def parse_symbol(text, size=9):
+    """Cell value for a typed symbol ('7', 'A', 'g'...); ValueError unless 1..size."""
+    text = text.strip().upper()
+    if len(text) != 1 or text not in SYMBOLS[1:size + 1]:
+        raise ValueError(f"not a digit of a {size}x{size} grid: {text!r}")
+    return SYMBOLS.index(text)
+
+
+class Board:
+    __slots__ = ("cells", "size", "_rows")
+
+    def __init__(self, source=None, size=9):
+        """
+        Args:
+            source: None for an empty board, another Board, n * n bytes of
+                cell values, or an n x n nested list. Always copied.
+            size (int): Grid size of an empty board; otherwise taken from
+                `source`.
+        """
+        if source is None:
+            cells = bytearray(size * size)
+        elif isinstance(source, Board):
+            cells = bytearray(source.cells)
+        elif isinstance(source, (bytes, bytearray)):
+            cells = bytearray(source)
+        else:
+            cells = bytearray(v for row in source for v in row)
+        self.size = size_for(len(cells))
+        self.cells = cells
+        self._rows = None
+
+    @classmethod
+    def from_line(cls, line):
+        """Board from a line of n * n cell symbols ('0' or '.' = empty)."""
+        cells = line.encode("ascii").translate(_FROM_ASCII)
+        n = isqrt(len(cells))
+        if n * n != len(cells) or n not in SIZES or max(cells) > n:
+            raise ValueError(f"not an 81-digit (or 16/256/625-symbol) puzzle line: {line!r}")
+        return cls(cells)
+
+    def to_line(self):
+        return self.cells.translate(_TO_ASCII).decode("ascii")
+
+    def copy(self):
+        return Board(self.cells)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __reduce__(self):
+        # Row views can't be pickled; the cells are all the state there is
+        return (Board, (bytes(self.cells),))
+
+    # --------------------------------------------------
+    # Views
+    # --------------------------------------------------
+
+    def __getitem__(self, r):
+        # Row r as a writable memoryview, so board[r][c] = v updates the cells
+        rows = self._rows
+        if rows is None:
+            n = self.size
+            view = memoryview(self.cells)
+            rows = self._rows = [view[i:i + n] for i in range(0, n * n, n)]
+        return rows[r]
+
+    def __len__(self):
+        return self.size
+
+    def row(self, r):
+        n = self.size
+        return self.cells[r * n:r * n + n]
+
+    def col(self, c):
+        return self.cells[c::self.size]
+
+    def box(self, b):
+        n = self.size
+        w = isqrt(n)
+        start = (b // w) * w * n + (b % w) * w
+        cells = self.cells
+        return bytearray().join(cells[i:i + w] for i in range(start, start + w * n, n))
+
+    def to_lists(self):
+        n = self.size
+        return [list(self.cells[i:i + n]) for i in range(0, n * n, n)]
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.cells == other.cells
+        return NotImplemented
+
+    __hash__ = None # mutable
+
+    def __repr__(self):
+        return f"Board.from_line({self.to_line()!r})"
+
+
+def as_board(board):
+    """`board` itself if it is a Board, otherwise a new Board copied from it."""
+    return board if isinstance(board, Board) else Board(board)
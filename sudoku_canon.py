@@ -0,0 +1,236 @@
+# Canonical forms under the Sudoku symmetry group, and an LRU solution cache.
+#
+# Two grids are equivalent if one can be turned into the other by any mix of:
+#   - transposing the grid,
+#   - permuting bands (row triples) and rows within a band,
+#   - permuting stacks (column triples) and columns within a stack,
+#   - relabeling the digits.
+# shuffle_board / get_base_pattern produce exactly these, so many positions
+# the games see are equivalent. canonical_key() maps every grid in a class to
+# the same representative: the lexicographically smallest 81-character string
+# over the whole group ("minlex"), with digits relabeled in order of first
+# appearance and empty cells sorting first.
+#
+# The search builds the representative row by row and only keeps the partial
+# transforms tied for the smallest prefix. Partial transforms whose remaining
+# rows are identical are merged, so highly symmetric grids stay cheap too.
+#
+# Even so, canonicalizing a grid takes several milliseconds to a tenth of a
+# second, usually more than solving it. Canonical keys are for offline work:
+# sudoku_library.py uses them to drop equivalent puzzles from a build.
+# SolutionCache, which the games query on every move and hint, is keyed by
+# the exact grid instead.
+
+import threading
+from collections import OrderedDict
+from itertools import permutations
+from operator import itemgetter
+
+from sudoku_board import Board, as_board
+
+_PERMS3 = list(permutations(range(3)))
+
+
+# --------------------------------------------------
+# Canonical form
+# --------------------------------------------------
+
+def _min_row_columns(row):
+    # Column orders giving the smallest first-row image: within each stack
+    # the empty cells go first, and stacks are sorted by clue count. Every
+    # order that ties is returned (images of row 0 only depend on where the
+    # clues are, since they get labels 1, 2, 3... in order).
+    stacks = []
+    for s in range(3):
+        cols = range(3 * s, 3 * s + 3)
+        empty = [c for c in cols if row[c] == 0]
+        filled = [c for c in cols if row[c] != 0]
+        inner = [tuple(e) + tuple(f) for e in permutations(empty) for f in permutations(filled)]
+        stacks.append((len(filled), inner))
+    key = tuple(sorted(k for k, _ in stacks))
+
+    orders = []
+    for stack_order in _PERMS3:
+        if tuple(stacks[s][0] for s in stack_order) != key:
+            continue
+        partial = [()]
+        for s in stack_order:
+            partial = [p + inner for p in partial for inner in stacks[s][1]]
+        orders.extend(partial)
+    return key, orders
+
+
+def _image(row, getter, relabel, next_label):
+    # Row as it appears under a column order (`getter` = itemgetter(*order)),
+    # relabeling digits seen for the first time
+    out = []
+    relabel = list(relabel)
+    for d in getter(row):
+        if d:
+            label = relabel[d]
+            if not label:
+                label = relabel[d] = next_label
+                next_label += 1
+            out.append(label)
+        else:
+            out.append(0)
+    return tuple(out), tuple(relabel), next_label
+
+
+def _state_key(grid, getter, relabel, next_label, band_rest, other_bands):
+    # Two partial transforms with the same key have identical futures: same
+    # labels so far and the same remaining rows (as raw, column-ordered
+    # digits) in the same band structure.
+    return (relabel, next_label,
+            tuple(sorted(getter(grid[r]) for r in band_rest)),
+            tuple(sorted(tuple(sorted(getter(grid[r]) for r in band)) for band in other_bands)))
+
+
+def canonical_key(board):
+    """
+    Canonical representative of `board` under the full symmetry group.
+
+    Args:
+        board (Board | list[list[int]]): 9x9 grid, 0 = empty.
+
+    Returns:
+        str: The canonical grid as an 81-character string; equal for
+        equivalent grids, so it works as a deduplication key.
+    """
+    cells = as_board(board).cells
+    grids = (tuple(tuple(cells[r * 9:r * 9 + 9]) for r in range(9)),
+             tuple(tuple(cells[c::9]) for c in range(9)))
+
+    # Position 0: choose orientation, first row and column order
+    best = None
+    states = []
+    for t, grid in enumerate(grids):
+        for r in range(9):
+            key, orders = _min_row_columns(grid[r])
+            if best is not None and key > best:
+                continue
+            if best is None or key < best:
+                best = key
+                states = []
+            band = r // 3
+            band_rest = tuple(x for x in range(3 * band, 3 * band + 3) if x != r)
+            other_bands = tuple(tuple(range(3 * b, 3 * b + 3)) for b in range(3) if b != band)
+            for cp in orders:
+                getter = itemgetter(*cp)
+                image, relabel, next_label = _image(grid[r], getter, (0,) * 10, 1)
+                states.append((t, getter, band_rest, other_bands, relabel, next_label, image))
+
+    # All tied candidates share the same first-row image
+    images = [states[0][6]]
+    states = _dedupe([s[:6] for s in states], grids)
+
+    # Positions 1-8: extend every tied partial transform by one row
+    for p in range(1, 9):
+        best_image = None
+        next_states = []
+        for t, getter, band_rest, other_bands, relabel, next_label in states:
+            grid = grids[t]
+            if p % 3:
+                choices = [(r, tuple(x for x in band_rest if x != r), other_bands) for r in band_rest]
+            else:
+                choices = [(r, tuple(x for x in band if x != r), other_bands[:i] + other_bands[i + 1:])
+                           for i, band in enumerate(other_bands) for r in band]
+            for r, rest, others in choices:
+                image, new_relabel, new_next = _image(grid[r], getter, relabel, next_label)
+                if best_image is not None and image > best_image:
+                    continue
+                if best_image is None or image < best_image:
+                    best_image = image
+                    next_states = []
+                next_states.append((t, getter, rest, others, new_relabel, new_next))
+        images.append(best_image)
+        states = _dedupe(next_states, grids)
+
+    return "".join(str(v) for image in images for v in image)
+
+
+def _dedupe(states, grids):
+    seen = set()
+    unique = []
+    for state in states:
+        t, getter, band_rest, other_bands, relabel, next_label = state
+        key = _state_key(grids[t], getter, relabel, next_label, band_rest, other_bands)
+        if key not in seen:
+            seen.add(key)
+            unique.append(state)
+    return unique
+
+
+# --------------------------------------------------
+# LRU solution cache
+# --------------------------------------------------
+
+class SolutionCache:
+    """
+    Bounded LRU cache from puzzle to solution, keyed by the exact grid.
+
+    A lookup costs one dict access. Repeated positions hit; equivalent ones
+    (relabelings, permutations, transposes) do not, because canonicalizing
+    costs more than the solves it would save. Thread-safe, so solver threads
+    (AI workers, prefetchers) can share one instance. Works for every grid
+    size.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, board):
+        """
+        Cached result for `board` without solving.
+
+        Returns:
+            tuple[bool, Board | None]: (hit, solution). `solution` is None
+            on a miss or if the puzzle is cached as unsolvable.
+        """
+        board = as_board(board)
+        return self._lookup(bytes(board.cells))
+
+    def put(self, board, solved):
+        self._store(bytes(as_board(board).cells), solved)
+
+    def solve(self, board, solve_fn):
+        """
+        Solution of `board` from the cache, or from `solve_fn(board)` on a miss.
+
+        Returns a new board (or None if unsolvable); `board` is not mutated
+        unless `solve_fn` does so itself.
+        """
+        board = as_board(board)
+        key = bytes(board.cells)
+        hit, cached = self._lookup(key)
+        if hit:
+            return cached
+        solved = solve_fn(board)
+        self._store(key, solved)
+        return Board(solved) if solved else None
+
+    def _lookup(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            cached = self.entries[key]
+        return True, Board(cached) if cached is not None else None
+
+    def _store(self, key, solved):
+        cached = bytes(as_board(solved).cells) if solved else None
+        with self.lock:
+            self.entries[key] = cached
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,187 @@
+# Canvas board view shared by the three games.
+#
+# The whole grid is one tk.Canvas: a rectangle and a text item per cell,
+# the box lines on top, and a cursor outline for the selected cell. This
+# replaces a grid of n*n tk.Entry widgets, each with its own binding, which
+# made 16x16 and 25x25 windows slow to open and every re-render touch every
+# widget.
+#
+# BoardCanvas keeps the text, colours and lock state it last drew for every
+# cell and only reconfigures the canvas items whose state changes, so an AI
+# move costs one itemconfig and a new game redraws only the cells that
+# differ from the previous one.
+#
+# Keyboard focus model:
+#     click / arrow keys      select a cell (the canvas takes the focus)
+#     digit or letter         write it into the selected cell
+#     BackSpace / Delete      clear the selected cell
+# Locked cells (clues, AI moves) can be selected but not edited. Every edit
+# calls on_edit(row, col); the game reads the text with get() and accepts,
+# recolours or clears it, as it did with the Entry widgets.
+
+import tkinter as tk
+
+from sudoku_board import symbol
+from sudoku_logic import geometry
+
+BG = "white"
+HINT_BG = "#ffeb3b"
+GRID_LINE = "#999999"
+BOX_LINE = "black"
+CURSOR = "#2196F3"
+MARGIN = 3 # keeps the outer box lines inside the canvas
+
+ARROWS = {"Up": (-1, 0), "Down": (1, 0), "Left": (0, -1), "Right": (0, 1)}
+
+
+def cell_metrics(size):
+    """(cell side in pixels, font size) for a grid size; smaller for bigger grids so they fit on screen."""
+    return (50, 20) if size <= 9 else (34, 12) if size <= 16 else (26, 9)
+
+
+class BoardCanvas:
+    def __init__(self, parent, size, on_edit):
+        """
+        Draw an empty size x size board.
+
+        Args:
+            parent: Tk container to place the canvas in (pack() it after).
+            size (int): Grid size n.
+            on_edit (callable): on_edit(row, col), called after the user
+                typed into or cleared an unlocked cell.
+        """
+        self.size = size
+        self.on_edit = on_edit
+        box = geometry(size).box
+        px, font_size = cell_metrics(size)
+        self.cell_px = px
+        side = size * px + 2 * MARGIN
+        self.canvas = tk.Canvas(parent, width=side, height=side, bg=BG,
+                                highlightthickness=0, takefocus=1)
+
+        # What is currently drawn, per flat cell index
+        ncells = size * size
+        self.texts = [""] * ncells
+        self.fgs = ["black"] * ncells
+        self.bgs = [BG] * ncells
+        self.locked = [False] * ncells
+        self.highlighted = set()
+        self.selected = None
+
+        font = ("Helvetica", font_size, "bold")
+        self._rects = []
+        self._labels = []
+        for i in range(ncells):
+            r, c = divmod(i, size)
+            x, y = MARGIN + c * px, MARGIN + r * px
+            self._rects.append(self.canvas.create_rectangle(x, y, x + px, y + px, fill=BG, outline=GRID_LINE))
+            self._labels.append(self.canvas.create_text(x + px // 2, y + px // 2, text="", fill="black", font=font))
+        end = MARGIN + size * px
+        for k in range(0, size + 1, box):
+            at = MARGIN + k * px
+            self.canvas.create_line(MARGIN, at, end, at, fill=BOX_LINE, width=3)
+            self.canvas.create_line(at, MARGIN, at, end, fill=BOX_LINE, width=3)
+        self._cursor = self.canvas.create_rectangle(0, 0, 0, 0, outline=CURSOR, width=3, state="hidden")
+
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Key>", self._on_key)
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    # --------------------------------------------------
+    # Cells
+    # --------------------------------------------------
+
+    def get(self, row, col):
+        """Text shown in a cell ('' if empty)."""
+        return self.texts[row * self.size + col]
+
+    def set(self, row, col, text=None, fg=None, bg=None, locked=None):
+        """Change a cell's text, text colour, background or lock; None keeps the current value."""
+        self._update(row * self.size + col, text, fg, bg, locked)
+
+    def _update(self, i, text=None, fg=None, bg=None, locked=None):
+        # Only items whose state actually changes are reconfigured
+        label = {}
+        if text is not None and text != self.texts[i]:
+            self.texts[i] = label["text"] = text
+        if fg is not None and fg != self.fgs[i]:
+            self.fgs[i] = label["fill"] = fg
+        if label:
+            self.canvas.itemconfig(self._labels[i], **label)
+        if bg is not None and bg != self.bgs[i]:
+            self.bgs[i] = bg
+            self.canvas.itemconfig(self._rects[i], fill=bg)
+        if locked is not None:
+            self.locked[i] = locked
+
+    def render(self, board, initial):
+        """
+        Show `board`: clues of `initial` in black and locked, other filled
+        cells in blue, no highlights. Only cells that differ from what is on
+        screen are redrawn.
+        """
+        for i in self.highlighted:
+            self._update(i, bg=BG)
+        self.highlighted.clear()
+        for i, v in enumerate(board.cells):
+            given = initial.cells[i] != 0
+            # An empty cell's colour doesn't show; the game sets it on entry
+            fg = None if not v else "black" if given else "blue"
+            self._update(i, symbol(v), fg, None, given)
+
+    def lock_all(self):
+        """Lock every cell, e.g. while no puzzle is shown; the next render() unlocks the empty ones."""
+        self.locked = [True] * (self.size * self.size)
+
+    def highlight(self, row, col, color=HINT_BG):
+        """Give one cell a background colour, clearing any earlier highlight."""
+        i = row * self.size + col
+        for j in self.highlighted - {i}:
+            self._update(j, bg=BG)
+        self.highlighted = {i}
+        self._update(i, bg=color)
+
+    # --------------------------------------------------
+    # Focus and keyboard
+    # --------------------------------------------------
+
+    def select(self, row, col):
+        """Move the cursor to a cell."""
+        self.selected = (row, col)
+        px = self.cell_px
+        x, y = MARGIN + col * px, MARGIN + row * px
+        self.canvas.coords(self._cursor, x + 1, y + 1, x + px - 1, y + px - 1)
+        self.canvas.itemconfig(self._cursor, state="normal")
+        self.canvas.tag_raise(self._cursor)
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        row = (event.y - MARGIN) // self.cell_px
+        col = (event.x - MARGIN) // self.cell_px
+        if 0 <= row < self.size and 0 <= col < self.size:
+            self.select(row, col)
+
+    def _on_key(self, event):
+        if self.selected is None:
+            if event.keysym in ARROWS:
+                self.select(0, 0)
+            return
+        row, col = self.selected
+        if event.keysym in ARROWS:
+            dr, dc = ARROWS[event.keysym]
+            self.select(min(max(row + dr, 0), self.size - 1), min(max(col + dc, 0), self.size - 1))
+            return
+
+        i = row * self.size + col
+        if self.locked[i]:
+            return
+        if event.keysym in ("BackSpace", "Delete"):
+            text = ""
+        elif len(event.char) == 1 and event.char.isalnum():
+            text = event.char.upper()
+        else:
+            return
+        self._update(i, text)
+        self.on_edit(row, col)
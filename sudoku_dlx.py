@@ -0,0 +1,245 @@
+# Dancing Links (Knuth's Algorithm X) exact-cover solver for 9x9 Sudoku.
+#
+# Drop-in alternative to BitmaskSolver: exposes the same
+# solve(board) / count_solutions(board, limit) contract, so SudokuDuel in
+# sudoku_dp.py can switch backends by setting SudokuDuel.SOLVER = DLXSolver.
+#
+# Sudoku as exact cover: 729 candidate rows (r, c, v), 324 constraint columns
+#   cell      (r, c)   -> every cell holds exactly one digit
+#   row-digit (r, v)   -> every row holds each digit once
+#   col-digit (c, v)   -> every column holds each digit once
+#   box-digit (b, v)   -> every box holds each digit once
+#
+# The linked structure is built once at import time as flat integer lists;
+# each solve copies those lists (cheap C-level slices) instead of rebuilding.
+
+from sudoku_board import as_board
+from sudoku_stats import phase
+
+NUM_COLUMNS = 324
+ROOT = 0
+
+
+def _row_columns(r, c, v):
+    b = (r // 3) * 3 + (c // 3)
+    # +1 because node 0 is the root header
+    return (1 + r * 9 + c,
+            1 + 81 + r * 9 + v,
+            1 + 162 + c * 9 + v,
+            1 + 243 + b * 9 + v)
+
+
+def _build_template():
+    n_headers = NUM_COLUMNS + 1
+    L = [i - 1 for i in range(n_headers)]
+    R = [i + 1 for i in range(n_headers)]
+    L[ROOT] = NUM_COLUMNS
+    R[NUM_COLUMNS] = ROOT
+    U = list(range(n_headers))
+    D = list(range(n_headers))
+    C = list(range(n_headers))
+    S = [0] * n_headers
+    node_row = [-1] * n_headers    # node -> candidate row id (r*81 + c*9 + v)
+    row_first = [0] * 729          # candidate row id -> first node in that row
+
+    for r in range(9):
+        for c in range(9):
+            for v in range(9):
+                row_id = r * 81 + c * 9 + v
+                first = len(L)
+                row_first[row_id] = first
+                cols = _row_columns(r, c, v)
+                for k, col in enumerate(cols):
+                    node = first + k
+                    # horizontal circular list inside the row
+                    L.append(first + (k - 1) % 4)
+                    R.append(first + (k + 1) % 4)
+                    # append to bottom of the column
+                    U.append(U[col])
+                    D.append(col)
+                    D[U[col]] = node
+                    U[col] = node
+                    C.append(col)
+                    S[col] += 1
+                    node_row.append(row_id)
+    return L, R, U, D, C, S, node_row, row_first
+
+
+_L, _R, _U, _D, _C, _S, _NODE_ROW, _ROW_FIRST = _build_template()
+
+
+class DLXSolver:
+    def __init__(self, stats=None, size=9):
+        # The exact-cover matrix above is built for 9x9 grids only
+        if size != 9:
+            raise ValueError(f"DLXSolver only solves 9x9 grids, not {size}x{size}")
+        # Optional SearchStats; the searches recurse through self, so the
+        # counting wrappers bound here see every node
+        self.stats = stats
+        if stats is not None:
+            self._search_one = stats.counted(self._search_one)
+            self._search_count = stats.counted(self._search_count)
+
+    def _initialize_links(self, cells):
+        # Fresh copy of the template, then cover every column hit by a clue.
+        # Returns False when the clues conflict with each other.
+        if len(cells) != 81:
+            raise ValueError(f"DLXSolver only solves 9x9 grids, got {len(cells)} cells")
+        self.L = _L[:]
+        self.R = _R[:]
+        self.U = _U[:]
+        self.D = _D[:]
+        self.S = _S[:]
+        self.solution = []
+        covered = set()
+        for i in range(81):
+            val = cells[i]
+            if val == 0:
+                continue
+            # Candidate row id r*81 + c*9 + v is i*9 + v for flat cell i
+            first = _ROW_FIRST[i * 9 + val - 1]
+            node = first
+            while True:
+                col = _C[node]
+                if col in covered:
+                    return False
+                covered.add(col)
+                self._cover(col)
+                node = self.R[node]
+                if node == first:
+                    break
+        return True
+
+    def solve(self, board):
+        # Solves a Board in place and returns it, or None
+        board = as_board(board)
+        with phase(self.stats, "setup"):
+            ok = self._initialize_links(board.cells)
+        if not ok:
+            return None
+        with phase(self.stats, "search"):
+            found = self._search_one()
+        if not found:
+            return None
+        for row_id in self.solution:
+            i, v = divmod(row_id, 9)
+            board.cells[i] = v + 1
+        return board
+
+    def count_solutions(self, board, limit=2):
+        # Returns number of solutions found (stops at 'limit')
+        if self.stats is not None:
+            self.stats.count_calls += 1
+        with phase(self.stats, "setup"):
+            ok = self._initialize_links(as_board(board).cells)
+        if not ok:
+            return 0
+        with phase(self.stats, "search"):
+            return self._search_count(limit)
+
+    # --------------------------------------------------
+    # Dancing links primitives
+    # --------------------------------------------------
+
+    def _cover(self, col):
+        L, R, U, D, S = self.L, self.R, self.U, self.D, self.S
+        R[L[col]] = R[col]
+        L[R[col]] = L[col]
+        i = D[col]
+        while i != col:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[_C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, col):
+        L, R, U, D, S = self.L, self.R, self.U, self.D, self.S
+        i = U[col]
+        while i != col:
+            j = L[i]
+            while j != i:
+                S[_C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[col]] = col
+        L[R[col]] = col
+
+    def _choose_column(self):
+        # Column with the fewest remaining rows (Knuth's S heuristic)
+        R, S = self.R, self.S
+        best = None
+        best_size = 10
+        col = R[ROOT]
+        while col != ROOT:
+            size = S[col]
+            if size < best_size:
+                best, best_size = col, size
+                if size <= 1:
+                    break
+            col = R[col]
+        return best, best_size
+
+    # --------------------------------------------------
+    # Search
+    # --------------------------------------------------
+
+    def _search_one(self):
+        if self.R[ROOT] == ROOT:
+            return True
+        col, size = self._choose_column()
+        if size == 0:
+            return False
+        R, L, D = self.R, self.L, self.D
+        self._cover(col)
+        row = D[col]
+        while row != col:
+            self.solution.append(_NODE_ROW[row])
+            j = R[row]
+            while j != row:
+                self._cover(_C[j])
+                j = R[j]
+
+            if self._search_one():
+                return True
+
+            j = L[row]
+            while j != row:
+                self._uncover(_C[j])
+                j = L[j]
+            self.solution.pop()
+            row = D[row]
+        self._uncover(col)
+        return False
+
+    def _search_count(self, limit):
+        if self.R[ROOT] == ROOT:
+            return 1
+        col, size = self._choose_column()
+        if size == 0:
+            return 0
+        R, L, D = self.R, self.L, self.D
+        count = 0
+        self._cover(col)
+        row = D[col]
+        while row != col:
+            j = R[row]
+            while j != row:
+                self._cover(_C[j])
+                j = R[j]
+
+            count += self._search_count(limit - count)
+
+            j = L[row]
+            while j != row:
+                self._uncover(_C[j])
+                j = L[j]
+            if count >= limit: # Stop once we found enough
+                break
+            row = D[row]
+        self._uncover(col)
+        return count
@@ -1,224 +1,428 @@
 import tkinter as tk
 from tkinter import messagebox
-import heapq
+import argparse
 import random
-import copy
+import os
+from sudoku_board import Board, as_board, parse_symbol, symbol
+from sudoku_canon import SolutionCache
+from sudoku_canvas import BoardCanvas
+from sudoku_dlx import DLXSolver
+from sudoku_library import PuzzleLibrary
+from sudoku_prefetch import PuzzlePool
+from sudoku_rating import HOLE_FRACTIONS, generate_in_band
+from sudoku_stats import SearchStats, phase
+from sudoku_worker import AITask
+from sudoku_logic import SIZES, geometry, masks_from_cells, propagate, undo
+
+# Solutions of exact positions, shared by the AI and hints: a position the
+# hint already solved costs the AI a dict lookup, not a search.
+SOLUTIONS = SolutionCache()
+
+class _OutOfNodes(Exception):
+    pass
+
 
 class BitmaskSolver:
-    def __init__(self):
-        self.rows = [0] * 9
-        self.cols = [0] * 9
-        self.boxes = [0] * 9
+    def __init__(self, use_propagation=True, stats=None, size=9):
+        # Grid size n (9, 16, 25...): unit masks are n bits wide
+        self.size = size
+        self.geo = geometry(size)
+        self.rows = [0] * size
+        self.cols = [0] * size
+        self.boxes = [0] * size
+        # Run naked/hidden singles + locked candidates at every search node
+        self.use_propagation = use_propagation
+        # Optional SearchStats. The recursion calls self._backtrack etc., so
+        # binding counting wrappers here instruments every node while the
+        # class methods themselves stay check-free.
+        self.stats = stats
+        if stats is not None:
+            self._backtrack = stats.counted(self._backtrack)
+            self._backtrack_count = stats.counted(self._backtrack_count)
+            if use_propagation:
+                self._propagate = self._propagate_counted
 
     def _get_box_index(self, r, c):
-        return (r // 3) * 3 + (c // 3)
-
-    def _initialize_masks(self, board):
-        self.rows = [0] * 9
-        self.cols = [0] * 9
-        self.boxes = [0] * 9
-        empty_cells = []
-        for r in range(9):
-            for c in range(9):
-                if board[r][c] != 0:
-                    val = board[r][c] - 1
-                    mask = (1 << val)
-                    self.rows[r] |= mask
-                    self.cols[c] |= mask
-                    self.boxes[self._get_box_index(r, c)] |= mask
-                else:
-                    empty_cells.append((r, c))
+        return self.geo.box_index[r][c]
+
+    def _check_size(self, board):
+        if board.size != self.size:
+            raise ValueError(f"{board.size}x{board.size} board given to a {self.size}x{self.size} solver")
+        return board
+
+    def _initialize_masks(self, cells):
+        # Seeds the unit masks from flat cells; returns the empty cell indices
+        self.rows, self.cols, self.boxes, empty_cells = masks_from_cells(cells, self.geo)
         return empty_cells
 
+    # --------------------------------------------------
+    # Incremental state (persistent solver owned by the game)
+    # --------------------------------------------------
+    # load() seeds the masks once; place()/unplace() then keep them in sync
+    # with single-cell edits in O(1). Per-unit digit counts make unplace()
+    # correct even when the user has entered a conflicting duplicate.
+
+    def load(self, board):
+        n = self.size
+        self._check_size(board)
+        self.rows = [0] * n
+        self.cols = [0] * n
+        self.boxes = [0] * n
+        self.values = [0] * (n * n)
+        self.row_counts = [[0] * n for _ in range(n)]
+        self.col_counts = [[0] * n for _ in range(n)]
+        self.box_counts = [[0] * n for _ in range(n)]
+        cells = board.cells
+        geo = self.geo
+        for i in range(n * n):
+            if cells[i] != 0:
+                self.place(geo.cell_row[i], geo.cell_col[i], cells[i])
+
+    def place(self, r, c, v):
+        if self.values[r * self.size + c]:
+            self.unplace(r, c)
+        k = v - 1
+        mask = 1 << k
+        box_idx = self.geo.box_index[r][c]
+        self.values[r * self.size + c] = v
+        self.row_counts[r][k] += 1
+        self.col_counts[c][k] += 1
+        self.box_counts[box_idx][k] += 1
+        self.rows[r] |= mask; self.cols[c] |= mask; self.boxes[box_idx] |= mask
+
+    def unplace(self, r, c):
+        v = self.values[r * self.size + c]
+        if not v:
+            return
+        k = v - 1
+        mask = 1 << k
+        box_idx = self.geo.box_index[r][c]
+        self.values[r * self.size + c] = 0
+        self.row_counts[r][k] -= 1
+        self.col_counts[c][k] -= 1
+        self.box_counts[box_idx][k] -= 1
+        if not self.row_counts[r][k]: self.rows[r] &= ~mask
+        if not self.col_counts[c][k]: self.cols[c] &= ~mask
+        if not self.box_counts[box_idx][k]: self.boxes[box_idx] &= ~mask
+
+    def fork(self, stats=None):
+        # Copy of the incremental state (masks and values, nothing rescanned)
+        # for a search on another thread; take it on the thread that owns
+        # the state. Unit counts are left out, so the copy can't place().
+        search = BitmaskSolver(self.use_propagation, stats, self.size)
+        search.rows = self.rows[:]
+        search.cols = self.cols[:]
+        search.boxes = self.boxes[:]
+        search.values = self.values[:]
+        return search
+
+    def solve_from_state(self, check=None, check_every=500):
+        # Solves from the incrementally maintained state and returns a new
+        # board, or None. Searches on a fork so the persistent masks survive.
+        # check(), if given, runs every `check_every` nodes and may raise to
+        # abandon the search.
+        search = self.fork(self.stats)
+        board = Board(bytes(self.values))
+        empty_cells = [i for i, v in enumerate(self.values) if not v]
+
+        if check is not None:
+            step = search._backtrack
+            nodes = [0]
+
+            def checked(*args):
+                nodes[0] += 1
+                if nodes[0] % check_every == 0:
+                    check()
+                return step(*args)
+
+            search._backtrack = checked
+        with phase(self.stats, "search"):
+            found = search._backtrack(board.cells, empty_cells, [0] * self.geo.ncells)
+        return board if found else None
+
+    # --------------------------------------------------
+    # Full solves
+    # --------------------------------------------------
+
     def solve(self, board):
-        # Solves and returns the board, or None
-        empty_cells = self._initialize_masks(board)
-        empty_cells.sort(key=lambda cell: self._count_options(cell[0], cell[1]))
-        
-        if self._backtrack(board, empty_cells, 0):
-            return board
-        return None
+        # Solves a Board in place and returns it, or None
+        board = self._check_size(as_board(board))
+        with phase(self.stats, "setup"):
+            empty_cells = self._initialize_masks(board.cells)
+
+        with phase(self.stats, "search"):
+            found = self._backtrack(board.cells, empty_cells, [0] * self.geo.ncells)
+        return board if found else None
 
     def count_solutions(self, board, limit=2):
         # Returns number of solutions found (stops at 'limit')
-        self._initialize_masks(board) # Re-init masks for this check
-        
-        # Note: We don't sort empty_cells here to keep it simple/fast for checking
-        empty_cells = [(r, c) for r in range(9) for c in range(9) if board[r][c] == 0]
-        return self._backtrack_count(board, empty_cells, 0, limit)
+        cells = self._check_size(as_board(board)).cells
+        if self.stats is not None:
+            self.stats.count_calls += 1
+        with phase(self.stats, "setup"):
+            empty_cells = self._initialize_masks(cells) # Re-init masks for this check
+        with phase(self.stats, "search"):
+            return self._backtrack_count(cells, empty_cells, [0] * self.geo.ncells, limit)
+
+    def dig_holes(self, board, cells, target_holes, max_nodes=None):
+        """
+        Removes clues from a solved `board` in place, keeping the solution unique.
+
+        One solver state is reused for every removal. When the puzzle is
+        already unique, any second solution must differ from the known one
+        at the cell being emptied. So each test only searches for a
+        solution that excludes the removed digit there. It stops at the
+        first one found, and the search always restores the shared state
+        afterwards.
+
+        Args:
+            board (Board): A fully solved grid; becomes the puzzle.
+            cells (list[int]): Flat cell indices to try, in order.
+            target_holes (int): Stop after this many successful removals.
+            max_nodes (int | None): Give up on a removal whose test needs more
+                search nodes than this, and keep that clue. Near the minimum
+                clue count a 16x16 or 25x25 test can take minutes.
+
+        Returns:
+            int: Number of holes actually dug.
+        """
+        grid = self._check_size(board).cells
+        stats = self.stats
+        geo = self.geo
+        empty_cells = self._initialize_masks(grid)
+        elim = [0] * geo.ncells
+        holes = 0
+        for i in cells:
+            if holes >= target_holes:
+                break
+            val = grid[i]
+            if val == 0:
+                continue
+            mask = 1 << (val - 1)
+            r, c, box_idx = geo.cell_row[i], geo.cell_col[i], geo.cell_box[i]
+            grid[i] = 0
+            self.rows[r] &= ~mask; self.cols[c] &= ~mask; self.boxes[box_idx] &= ~mask
+            empty_cells.append(i)
+
+            elim[i] = mask
+            if stats is not None:
+                stats.count_calls += 1
+            if max_nodes is None:
+                other = self._backtrack_count(grid, empty_cells, elim, 1)
+            else:
+                other = self._count_within(grid, empty_cells, elim, max_nodes)
+            elim[i] = 0
+
+            if other:
+                # Another solution exists without this clue: put it back
+                empty_cells.remove(i)
+                grid[i] = val
+                self.rows[r] |= mask; self.cols[c] |= mask; self.boxes[box_idx] |= mask
+            else:
+                holes += 1
+        return holes
+
+    def _count_within(self, cells, empty_cells, elim, max_nodes):
+        # _backtrack_count(..., limit=1) that stops after max_nodes nodes and
+        # then reports 1 (as if another solution existed), with the cells,
+        # masks and empty list put back as they were
+        saved = bytes(cells), empty_cells[:], self.rows[:], self.cols[:], self.boxes[:]
+        step = self._backtrack_count
+        budget = [max_nodes]
+
+        def bounded(*args):
+            budget[0] -= 1
+            if budget[0] < 0:
+                raise _OutOfNodes
+            return step(*args)
+
+        self._backtrack_count = bounded
+        try:
+            return bounded(cells, empty_cells, elim, 1)
+        except _OutOfNodes:
+            cells[:], empty_cells[:], self.rows, self.cols, self.boxes = saved
+            return 1
+        finally:
+            self._backtrack_count = step
 
     def _count_options(self, r, c):
-        box_idx = self._get_box_index(r, c)
-        taken = self.rows[r] | self.cols[c] | self.boxes[box_idx]
-        options = 0
-        for k in range(9):
-            if not (taken & (1 << k)):
-                options += 1
-        return options
-
-    def _backtrack(self, board, empty_cells, idx):
-        if idx == len(empty_cells):
+        geo = self.geo
+        taken = self.rows[r] | self.cols[c] | self.boxes[geo.box_index[r][c]]
+        return geo.popcount[geo.full_mask & ~taken]
+
+    def _select_cell(self, empty_cells, elim):
+        # Dynamic MRV: index and free-digit mask of the most constrained
+        # remaining cell, re-evaluated at every node. Returns (-1, 0) as soon
+        # as some cell has no options left, so the branch fails immediately.
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+        geo = self.geo
+        full_mask, popcount = geo.full_mask, geo.popcount
+        cell_row, cell_col, cell_box = geo.cell_row, geo.cell_col, geo.cell_box
+        best_idx = -1
+        best_free = 0
+        best_count = self.size + 1
+        for idx, i in enumerate(empty_cells):
+            free = full_mask & ~(rows[cell_row[i]] | cols[cell_col[i]] | boxes[cell_box[i]] | elim[i])
+            count = popcount[free]
+            if count < best_count:
+                if count == 0:
+                    return -1, 0
+                best_idx, best_free, best_count = idx, free, count
+                if count == 1:
+                    break
+        return best_idx, best_free
+
+    def _take_cell(self, empty_cells, idx):
+        # Swap-remove so picking a cell from the middle of the list is O(1);
+        # callers append it back when they backtrack (order doesn't matter).
+        empty_cells[idx], empty_cells[-1] = empty_cells[-1], empty_cells[idx]
+        return empty_cells.pop()
+
+    def _propagate(self, cells, empty_cells, elim, trail):
+        # Logical pre-pass for one node; False means this branch is dead.
+        # `elim` is this node's private copy of the eliminations.
+        if not self.use_propagation:
             return True
-        r, c = empty_cells[idx]
-        box_idx = self._get_box_index(r, c)
-        taken = self.rows[r] | self.cols[c] | self.boxes[box_idx]
-        for k in range(9):
-            mask = 1 << k
-            if not (taken & mask):
-                board[r][c] = k + 1
-                self.rows[r] |= mask; self.cols[c] |= mask; self.boxes[box_idx] |= mask
-                
-                if self._backtrack(board, empty_cells, idx + 1):
-                    return True
-                
-                self.rows[r] &= ~mask; self.cols[c] &= ~mask; self.boxes[box_idx] &= ~mask
-                board[r][c] = 0
+        return propagate(cells, self.rows, self.cols, self.boxes, empty_cells, elim, trail, self.geo)
+
+    def _propagate_counted(self, cells, empty_cells, elim, trail):
+        # _propagate when stats are on: passes, forced cells and time
+        stats = self.stats
+        stats.propagations += 1
+        with stats.phase("propagate"):
+            ok = BitmaskSolver._propagate(self, cells, empty_cells, elim, trail)
+        stats.forced += len(trail)
+        return ok
+
+    def _undo(self, cells, empty_cells, trail):
+        undo(cells, self.rows, self.cols, self.boxes, empty_cells, trail, self.geo)
+
+    def _backtrack(self, cells, empty_cells, elim):
+        elim = elim[:]
+        trail = []
+        if not self._propagate(cells, empty_cells, elim, trail):
+            self._undo(cells, empty_cells, trail)
+            return False
+        if not empty_cells:
+            return True
+        idx, free = self._select_cell(empty_cells, elim)
+        if idx < 0:
+            self._undo(cells, empty_cells, trail)
+            return False
+        cell = self._take_cell(empty_cells, idx)
+        geo = self.geo
+        r, c, box_idx = geo.cell_row[cell], geo.cell_col[cell], geo.cell_box[cell]
+        for val, mask in geo.candidates[free]:
+            cells[cell] = val
+            self.rows[r] |= mask; self.cols[c] |= mask; self.boxes[box_idx] |= mask
+
+            if self._backtrack(cells, empty_cells, elim):
+                return True
+
+            self.rows[r] &= ~mask; self.cols[c] &= ~mask; self.boxes[box_idx] &= ~mask
+            cells[cell] = 0
+        empty_cells.append(cell)
+        self._undo(cells, empty_cells, trail)
         return False
 
-    def _backtrack_count(self, board, empty_cells, idx, limit):
-        if idx == len(empty_cells):
+    def _backtrack_count(self, cells, empty_cells, elim, limit):
+        elim = elim[:]
+        trail = []
+        if not self._propagate(cells, empty_cells, elim, trail):
+            self._undo(cells, empty_cells, trail)
+            return 0
+        if not empty_cells:
+            self._undo(cells, empty_cells, trail)
             return 1
-        
-        r, c = empty_cells[idx]
-        box_idx = self._get_box_index(r, c)
-        taken = self.rows[r] | self.cols[c] | self.boxes[box_idx]
-        
+        idx, free = self._select_cell(empty_cells, elim)
+        if idx < 0:
+            self._undo(cells, empty_cells, trail)
+            return 0
+        cell = self._take_cell(empty_cells, idx)
+        geo = self.geo
+        r, c, box_idx = geo.cell_row[cell], geo.cell_col[cell], geo.cell_box[cell]
+
         count = 0
-        for k in range(9):
-            mask = 1 << k
-            if not (taken & mask):
-                board[r][c] = k + 1
-                self.rows[r] |= mask; self.cols[c] |= mask; self.boxes[box_idx] |= mask
-                
-                count += self._backtrack_count(board, empty_cells, idx + 1, limit)
-                
-                self.rows[r] &= ~mask; self.cols[c] &= ~mask; self.boxes[box_idx] &= ~mask
-                board[r][c] = 0
-                
-                if count >= limit: # Optimization: Stop if we found enough
-                    return count
-        return count
+        for val, mask in geo.candidates[free]:
+            cells[cell] = val
+            self.rows[r] |= mask; self.cols[c] |= mask; self.boxes[box_idx] |= mask
 
-class BitmaskSolver:
-    def __init__(self):
-        self.rows = [0] * 9
-        self.cols = [0] * 9
-        self.boxes = [0] * 9
+            count += self._backtrack_count(cells, empty_cells, elim, limit)
 
-    def _get_box_index(self, r, c):
-        return (r // 3) * 3 + (c // 3)
-
-    def _initialize_masks(self, board):
-        self.rows = [0] * 9
-        self.cols = [0] * 9
-        self.boxes = [0] * 9
-        empty_cells = []
-        for r in range(9):
-            for c in range(9):
-                if board[r][c] != 0:
-                    val = board[r][c] - 1
-                    mask = (1 << val)
-                    self.rows[r] |= mask
-                    self.cols[c] |= mask
-                    self.boxes[self._get_box_index(r, c)] |= mask
-                else:
-                    empty_cells.append((r, c))
-        return empty_cells
+            self.rows[r] &= ~mask; self.cols[c] &= ~mask; self.boxes[box_idx] &= ~mask
+            cells[cell] = 0
 
-    def solve(self, board):
-        # Solves and returns the board, or None
-        empty_cells = self._initialize_masks(board)
-        empty_cells.sort(key=lambda cell: self._count_options(cell[0], cell[1]))
-        
-        if self._backtrack(board, empty_cells, 0):
-            return board
-        return None
+            if count >= limit: # Optimization: Stop if we found enough
+                break
+        empty_cells.append(cell)
+        self._undo(cells, empty_cells, trail)
+        return count
 
-    def count_solutions(self, board, limit=2):
-        # Returns number of solutions found (stops at 'limit')
-        self._initialize_masks(board) # Re-init masks for this check
-        
-        # We need a simplified backtrack that counts instead of returning
-        # Note: We don't sort empty_cells here to keep it simple/fast for checking
-        empty_cells = [(r, c) for r in range(9) for c in range(9) if board[r][c] == 0]
-        return self._backtrack_count(board, empty_cells, 0, limit)
 
-    def _count_options(self, r, c):
-        box_idx = self._get_box_index(r, c)
-        taken = self.rows[r] | self.cols[c] | self.boxes[box_idx]
-        options = 0
-        for k in range(9):
-            if not (taken & (1 << k)):
-                options += 1
-        return options
-
-    def _backtrack(self, board, empty_cells, idx):
-        if idx == len(empty_cells):
-            return True
-        r, c = empty_cells[idx]
-        box_idx = self._get_box_index(r, c)
-        taken = self.rows[r] | self.cols[c] | self.boxes[box_idx]
-        for k in range(9):
-            mask = 1 << k
-            if not (taken & mask):
-                board[r][c] = k + 1
-                self.rows[r] |= mask; self.cols[c] |= mask; self.boxes[box_idx] |= mask
-                
-                if self._backtrack(board, empty_cells, idx + 1):
-                    return True
-                
-                self.rows[r] &= ~mask; self.cols[c] &= ~mask; self.boxes[box_idx] &= ~mask
-                board[r][c] = 0
-        return False
+# Solver backends selectable with --solver (names as in sudoku_batch)
+SOLVERS = {"dp": BitmaskSolver, "dlx": DLXSolver}
 
-    def _backtrack_count(self, board, empty_cells, idx, limit):
-        if idx == len(empty_cells):
-            return 1
-        
-        r, c = empty_cells[idx]
-        box_idx = self._get_box_index(r, c)
-        taken = self.rows[r] | self.cols[c] | self.boxes[box_idx]
-        
-        count = 0
-        for k in range(9):
-            mask = 1 << k
-            if not (taken & mask):
-                board[r][c] = k + 1
-                self.rows[r] |= mask; self.cols[c] |= mask; self.boxes[box_idx] |= mask
-                
-                count += self._backtrack_count(board, empty_cells, idx + 1, limit)
-                
-                self.rows[r] &= ~mask; self.cols[c] &= ~mask; self.boxes[box_idx] &= ~mask
-                board[r][c] = 0
-                
-                if count >= limit: # Optimization: Stop if we found enough
-                    return count
-        return count
 
 class SudokuDuel:
-    def __init__(self, root):
+    # Backend used for solving and uniqueness checks. Any class exposing
+    # solve(board) / count_solutions(board, limit) and taking `stats` and
+    # `size` keywords works, e.g. DLXSolver (9x9 only).
+    SOLVER = BitmaskSolver
+
+    # AI search runs off the Tk thread; give up after this many seconds
+    AI_TIMEOUT = 5.0
+    # Search nodes between cancellation/deadline checks
+    AI_SLICE_NODES = 500
+    # Search nodes allowed per removal test on grids other than 9x9
+    # (dig_holes max_nodes)
+    DIG_MAX_NODES = 100
+
+    def __init__(self, root, size=9, library=None):
         self.root = root
-        self.root.title("Sudoku Duel — User vs DP AI")
-        self.root.geometry("600x750")
+        # Grid size n: an n x n board of sqrt(n) x sqrt(n) boxes
+        self.size = size
+        self.geo = geometry(size)
+        self.root.title("Sudoku Duel — User vs DP AI" if size == 9 else
+                        f"Sudoku Duel — User vs DP AI ({size}x{size})")
+        if size == 9:
+            self.root.geometry("600x750")
         self.root.configure(bg="#ffffff")
         self.root.resizable(False, False)
 
         # Game state
-        self.board = [[0]*9 for _ in range(9)]
-        self.initial_board = [[0]*9 for _ in range(9)]
-        self.solution_board = [[0]*9 for _ in range(9)]
-        self.cells = [[None]*9 for _ in range(9)]
+        self.board = Board(size=size)
+        self.initial_board = Board(size=size)
+        self.solution_board = Board(size=size)
 
         self.current_turn = "user"
         self.game_over = False
         self.difficulty = "Medium"
         self.difficulty_var = tk.StringVar(value=self.difficulty)
 
-        self.pq = []
-        self.pq_entries = set()
+        # Persistent constraint state, kept in sync move by move
+        self.solver = BitmaskSolver(size=size)
+
+        # In-flight background AI search, hint search and puzzle generation
+        # (None when idle)
+        self.ai_task = None
+        self.hint_task = None
+        self.puzzle_task = None
+
+        # Solver stats, collected only while "Show Solver Stats" is ticked.
+        # collect_stats mirrors the checkbox for the prefetch thread.
+        self.collect_stats = False
+        self.generator_stats = SearchStats()
+
+        # Ready-made puzzles per difficulty, refilled in the background
+        pool_file = "dp_puzzles.json" if size == 9 else f"dp_puzzles_{size}.json"
+        self.puzzles = PuzzlePool(self._make_pooled_puzzle,
+                                  path=os.path.join(os.path.expanduser("~"), ".sudoku_duel", pool_file),
+                                  library=library)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.create_widgets()
         self.new_game()
+        self.puzzles.start()
 
     # --------------------------------------------------
     # GUI
@@ -250,27 +454,8 @@ class SudokuDuel:
         board_frame = tk.Frame(self.root, bg="#d0d0d0", bd=4, relief=tk.SUNKEN)
         board_frame.pack(pady=10)
 
-        for i in range(9):
-            for j in range(9):
-                pady_top = 2 if i % 3 == 0 and i != 0 else 0
-                padx_left = 2 if j % 3 == 0 and j != 0 else 0
-
-                cell = tk.Entry(board_frame, width=3,
-                                font=("Helvetica", 20, "bold"),
-                                justify="center",
-                                bd=1, relief=tk.SOLID,
-                                bg="white",
-                                disabledbackground="white",
-                                disabledforeground="black")
-
-                cell.grid(row=i, column=j,
-                          padx=(padx_left, 0),
-                          pady=(pady_top, 0))
-
-                cell.bind("<KeyRelease>",
-                          lambda e, r=i, c=j: self.on_cell_edit(r, c))
-
-                self.cells[i][j] = cell
+        self.view = BoardCanvas(board_frame, self.size, self.on_cell_edit)
+        self.view.pack()
 
         button_frame = tk.Frame(self.root, bg="#ffffff")
         button_frame.pack(pady=20)
@@ -281,6 +466,18 @@ class SudokuDuel:
                        variable=self.strict_var,
                        bg="#ffffff").pack(pady=5)
 
+        self.stats_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.root,
+                       text="Show Solver Stats",
+                       variable=self.stats_var,
+                       bg="#ffffff",
+                       command=self.on_stats_toggle).pack()
+        self.stats_label = tk.Label(self.root, text="",
+                                    font=("Helvetica", 9),
+                                    bg="#ffffff", fg="#555555",
+                                    wraplength=560)
+        self.stats_label.pack(pady=2)
+
         tk.Button(button_frame, text="New Game",
                   command=self.new_game,
                   font=("Helvetica", 12),
@@ -313,129 +510,112 @@ class SudokuDuel:
         self.difficulty = self.difficulty_var.get()
         self.new_game()
 
-    def generate_puzzle(self):
-        # 1. Start with a full valid board
-        full_board = self.shuffle_board(self.get_base_pattern())
-        self.solution_board = copy.deepcopy(full_board)
-        self.board = copy.deepcopy(full_board)
-
-        # 2. Define attempts based on difficulty
-        # Higher difficulty = we try to remove more numbers
-        if self.difficulty == "Easy":
-            target_holes = 30
-        elif self.difficulty == "Medium":
-            target_holes = 45
+    def _make_pooled_puzzle(self, difficulty):
+        return self.make_puzzle(difficulty, self.generator_stats if self.collect_stats else None)
+
+    def make_puzzle(self, difficulty, stats=None):
+        # Pure generator (no widget/game state): safe on the prefetch thread.
+        # Returns (puzzle, solution). 9x9 puzzles are rated inside the
+        # difficulty's band (sudoku_rating.BANDS) rather than just by their
+        # number of holes. `stats` (SearchStats) collects the uniqueness checks and fill/dig
+        # times.
+        solver = self.SOLVER(stats=stats, size=self.size)
+        if hasattr(solver, "dig_holes"):
+            # Fast path: one solver state reused across all removals
+            dig_unique = solver.dig_holes
         else:
-            target_holes = 55 # Very Hard
+            dig_unique = lambda board, cells, target_holes: self._dig_with_counts(solver, board, cells, target_holes)
+
+        def new_grid():
+            with phase(stats, "fill"):
+                return Board(self.shuffle_board(self.get_base_pattern()))
+
+        if self.size != 9:
+            # No technique rating off 9x9: dig a share of the cells, unique
+            board = new_grid()
+            solution = board.copy()
+            cells = list(range(self.geo.ncells))
+            random.shuffle(cells)
+            target_holes = round(self.geo.ncells * HOLE_FRACTIONS[self.size][difficulty])
+            with phase(stats, "dig"):
+                if hasattr(solver, "dig_holes"):
+                    solver.dig_holes(board, cells, target_holes, self.DIG_MAX_NODES)
+                else:
+                    dig_unique(board, cells, target_holes)
+            return board, solution
 
-        cells = [(r, c) for r in range(9) for c in range(9)]
-        random.shuffle(cells)
-        
-        solver = BitmaskSolver()
-        holes = 0
+        # Easy keeps plenty of clues; Medium and Hard dig as deep as their
+        # band allows
+        target_holes = 30 if difficulty == "Easy" else 81
+        with phase(stats, "dig"):
+            return generate_in_band(new_grid, difficulty, target_holes, dig_unique)
 
-        for r, c in cells:
+    def _dig_with_counts(self, solver, board, cells, target_holes):
+        # Uniqueness-checked digging for backends without dig_holes
+        holes = 0
+        for i in cells:
             if holes >= target_holes:
                 break
-            
+
             # Save value
-            backup = self.board[r][c]
-            self.board[r][c] = 0
-            
+            backup = board.cells[i]
+            board.cells[i] = 0
+
             # Check if unique (we pass a copy so we don't mess up masks)
             # We assume the user wants strictly 1 solution
-            solutions = solver.count_solutions(copy.deepcopy(self.board), limit=2)
-            
+            solutions = solver.count_solutions(board.copy(), limit=2)
+
             if solutions != 1:
                 # If 0 solutions (impossible) or >1 solutions (ambiguous), revert
-                self.board[r][c] = backup
+                board.cells[i] = backup
             else:
                 holes += 1
-
-        return self.board
+        return holes
 
     def get_base_pattern(self):
+        n, box = self.size, self.geo.box
         def pattern(r, c):
-            return (3 * (r % 3) + r // 3 + c) % 9
-        nums = list(range(1, 10))
+            return (box * (r % box) + r // box + c) % n
+        nums = list(range(1, n + 1))
         random.shuffle(nums)
-        return [[nums[pattern(r, c)] for c in range(9)] for r in range(9)]
+        return [[nums[pattern(r, c)] for c in range(n)] for r in range(n)]
 
     def shuffle_board(self, board):
-        for i in range(0, 9, 3):
-            block = board[i:i+3]
+        n, box = self.size, self.geo.box
+        for i in range(0, n, box):
+            block = board[i:i+box]
             random.shuffle(block)
-            board[i:i+3] = block
+            board[i:i+box] = block
         board = list(map(list, zip(*board)))
-        for i in range(0, 9, 3):
-            block = board[i:i+3]
+        for i in range(0, n, box):
+            block = board[i:i+box]
             random.shuffle(block)
-            board[i:i+3] = block
+            board[i:i+box] = block
         board = list(map(list, zip(*board)))
         return board
 
 
     
 
-    # --------------------------------------------------
-    # DP SOLVER (Bitmasking + MRV)
-    # --------------------------------------------------
-
-    def solve_dp(self, board_snapshot):
-        """
-        Solves the Sudoku puzzle using a high-performance Bitmasking approach.
-        
-        This method acts as a wrapper for the `BitmaskSolver` class. It employs 
-        State Compression (representing row/col/box constraints as integer bits) 
-        instead of Set objects. This is a foundational technique in Dynamic 
-        Programming (DP) for state representation, offering significantly faster 
-        performance than standard backtracking.
-
-        Algorithm Strategy:
-        1. State Compression: Converts board constraints into 3 arrays of integers 
-           (rows, cols, boxes), where the Nth bit represents the Nth number.
-        2. MRV Heuristic: The solver internally sorts empty cells by the number 
-           of valid options (Minimum Remaining Values) to prune the search tree early.
-        3. Backtracking: Recursively fills cells using bitwise operations for 
-           O(1) constant-time validity checks.
-
-        Args:
-            board_snapshot (list[list[int]]): A snapshot of the current board state.
-
-        Returns:
-            list[list[int]] | None: The fully solved board grid if a solution exists, 
-                                    otherwise None.
-        """
-        # Instantiate the high-performance Bitmask solver
-        solver = BitmaskSolver()
-        
-        # Create a deep copy to prevent the solver's internal state mutations 
-        # from affecting the live UI board before a solution is confirmed.
-        board_copy = copy.deepcopy(board_snapshot)
-        
-        result = solver.solve(board_copy)
-        return result
-
-    
     # --------------------------------------------------
     # AI Logic
     # --------------------------------------------------
 
     def ai_turn(self):
-        if self.game_over:
+        if self.game_over or self.ai_task is not None:
             return
 
         # 1. Analyze the board incrementally for logical deductions
-        solver = BitmaskSolver()
-        solver._initialize_masks(self.board)
+        # (self.solver is kept in sync by on_cell_edit and our own moves)
+        solver = self.solver
         
         best_cell = None
-        min_options = 10
+        min_options = self.size + 1
         best_val = None
         
         # Scan for the most constrained cell (Minimum Remaining Values heuristic)
-        for r in range(9):
-            for c in range(9):
+        for r in range(self.size):
+            for c in range(self.size):
                 if self.board[r][c] == 0:
                     options_count = solver._count_options(r, c)
                     if options_count < min_options:
@@ -454,26 +634,93 @@ class SudokuDuel:
             
         elif min_options == 1:
             # TRUE INCREMENTAL SOLVE: The AI plays a Naked Single 
-            box_idx = solver._get_box_index(r, c)
-            taken = solver.rows[r] | solver.cols[c] | solver.boxes[box_idx]
-            for k in range(9):
-                if not (taken & (1 << k)):
-                    best_val = k + 1
-                    break
+            geo = self.geo
+            taken = solver.rows[r] | solver.cols[c] | solver.boxes[geo.box_index[r][c]]
+            best_val = geo.candidates[geo.full_mask & ~taken][0][0]
         else:
             # FALLBACK: If there are no obvious 1-option deductions, pick the cell with 
             # the fewest options and use DP to ensure we stay on a valid solve path.
-            solved = self.solve_dp(self.board)
-            if not solved:
-                messagebox.showinfo("Game Over", "No solution exists from this state.")
-                return
-            best_val = solved[r][c]
+            # The search runs on a worker thread; the GUI polls for the result.
+            stats = SearchStats() if self.stats_var.get() else None
+            search = self.position_search(stats)
+            self.current_turn = "ai"
+            self.status_label.config(text="AI is Thinking...")
+            self.ai_task = AITask(self.root, search,
+                                  lambda solved: self._ai_search_done(r, c, solved, stats),
+                                  on_timeout=self._ai_timed_out,
+                                  on_error=self._ai_failed,
+                                  timeout=self.AI_TIMEOUT).start()
+            return
+
+        if self.stats_var.get():
+            self.stats_label.config(text="AI: naked single, no search")
+        self._ai_apply_move(r, c, best_val)
+
+    def position_search(self, stats=None):
+        """
+        Snapshot the current position for a solve off the Tk thread.
+
+        Call on the Tk thread; the returned compute(check) can then run on
+        an AITask worker. With the default SOLVER the search starts from a
+        fork of the persistent solver state (self.solver) and checks for
+        cancellation every AI_SLICE_NODES nodes. Other backends solve a
+        board snapshot and can only be cancelled before they start.
+        Results go through the solution cache SOLUTIONS; a cancelled search
+        raises out of compute and caches nothing.
+
+        Returns:
+            callable: compute(check) -> Board | None.
+        """
+        snapshot = self.board.copy()
+        if self.SOLVER is BitmaskSolver:
+            search = self.solver.fork(stats)
+
+            def compute(check):
+                return SOLUTIONS.solve(snapshot, lambda board: search.solve_from_state(check, self.AI_SLICE_NODES))
+        else:
+            solver = self.SOLVER(stats=stats, size=self.size)
+
+            def compute(check):
+                check()
+                return SOLUTIONS.solve(snapshot, lambda board: solver.solve(board.copy()))
+        return compute
+
+    def _ai_search_done(self, r, c, solved, stats=None):
+        self.ai_task = None
+        self.show_search_stats("AI", stats)
+        self.current_turn = "user"
+        self.status_label.config(text=f"User's Turn ({self.difficulty})")
+        if not solved:
+            messagebox.showinfo("Game Over", "No solution exists from this state.")
+            return
+        self._ai_apply_move(r, c, solved[r][c])
+
+    def _ai_timed_out(self):
+        self.ai_task = None
+        self.current_turn = "user"
+        self.status_label.config(text=f"User's Turn ({self.difficulty})")
+        messagebox.showinfo("AI", "The AI ran out of time on this position. Your move!")
+
+    def _ai_failed(self, error):
+        # The search raised: hand the turn back so later AI turns still run,
+        # then let Tk report the error
+        self.ai_task = None
+        self.current_turn = "user"
+        self.status_label.config(text=f"User's Turn ({self.difficulty})")
+        raise error
+
+    def cancel_ai(self):
+        # Drop any in-flight AI search (Reset / New Game)
+        if self.ai_task is not None:
+            self.ai_task.cancel()
+            self.ai_task = None
+        self.current_turn = "user"
 
+    def _ai_apply_move(self, r, c, best_val):
         # 3. Apply the Move
         self.board[r][c] = best_val
-        self.cells[r][c].delete(0, tk.END)
-        self.cells[r][c].insert(0, str(best_val))
-        self.cells[r][c].config(fg="red")
+        self.solver.place(r, c, best_val)
+        self.view.set(r, c, symbol(best_val), fg="red")
 
         if self.is_complete():
             self.game_over = True
@@ -484,30 +731,29 @@ class SudokuDuel:
     # --------------------------------------------------
 
     def on_cell_edit(self, row, col):
-        if self.game_over or self.initial_board[row][col] != 0:
+        if self.game_over or self.current_turn != "user" or self.initial_board[row][col] != 0:
             return
 
-        cell = self.cells[row][col]
-        v = cell.get().strip()
+        v = self.view.get(row, col).strip()
 
         if v == "":
             self.board[row][col] = 0
+            self.solver.unplace(row, col)
             return
 
         try:
-            num = int(v)
-            if not (1 <= num <= 9):
-                raise ValueError
+            num = parse_symbol(v, self.size)
 
             if self.strict_var.get():
                 if num != self.solution_board[row][col]:
                     messagebox.showerror("Incorrect",
                                          "Strict Mode: Wrong value.")
-                    cell.delete(0, tk.END)
+                    self.view.set(row, col, "")
                     return
 
             self.board[row][col] = num
-            cell.config(fg="blue")
+            self.solver.place(row, col, num)
+            self.view.set(row, col, fg="blue")
 
             if self.is_complete():
                 self.game_over = True
@@ -515,31 +761,32 @@ class SudokuDuel:
             else:
                 self.ai_turn()
         except ValueError:
-            cell.delete(0, tk.END)
+            self.view.set(row, col, "")
 
     def is_complete(self):
         """Check if the board is fully filled AND is a valid Sudoku solution."""
-        for i in range(9):
-            for j in range(9):
+        n, w = self.size, self.geo.box
+        for i in range(n):
+            for j in range(n):
                 if self.board[i][j] == 0:
                     return False
 
-        for i in range(9):
-            if len(set(self.board[i])) != 9:
+        for i in range(n):
+            if len(set(self.board[i])) != n:
                 return False
 
-        for j in range(9):
-            col = {self.board[i][j] for i in range(9)}
-            if len(col) != 9:
+        for j in range(n):
+            col = {self.board[i][j] for i in range(n)}
+            if len(col) != n:
                 return False
 
-        for br in range(0, 9, 3):
-            for bc in range(0, 9, 3):
+        for br in range(0, n, w):
+            for bc in range(0, n, w):
                 box = set()
-                for i in range(br, br + 3):
-                    for j in range(bc, bc + 3):
+                for i in range(br, br + w):
+                    for j in range(bc, bc + w):
                         box.add(self.board[i][j])
-                if len(box) != 9:
+                if len(box) != n:
                     return False
 
         return True
@@ -547,49 +794,119 @@ class SudokuDuel:
     # --------------------------------------------------
 
     def new_game(self):
+        self.cancel_ai()
+        if self.puzzle_task is not None:
+            self.puzzle_task.cancel()
+            self.puzzle_task = None
+        item = self.puzzles.take(self.difficulty)
+        if item is not None:
+            self._start_game(item)
+            return
+
+        # Nothing prefetched for this difficulty yet. Generating can take a
+        # few hundred ms (Hard retries fresh grids until one needs search),
+        # so it runs off the Tk thread on an empty, locked board.
+        difficulty = self.difficulty
+        self.game_over = True
+        self.board = Board(size=self.size)
+        self.initial_board = self.board.copy()
+        self.solver.load(self.board)
+        self.render_board()
+        self.view.lock_all()
+        self.status_label.config(text=f"Generating a {difficulty} puzzle...")
+        self.puzzle_task = AITask(self.root, lambda check: self._make_pooled_puzzle(difficulty),
+                                  self._start_game, on_error=self._puzzle_failed).start()
+
+    def _start_game(self, item):
+        self.puzzle_task = None
+        self.board, self.solution_board = item
         self.game_over = False
-        self.board = self.generate_puzzle()
-        self.initial_board = copy.deepcopy(self.board)
+        self.initial_board = self.board.copy()
+        self.solver.load(self.board)
         self.render_board()
         self.status_label.config(
             text=f"User's Turn ({self.difficulty})"
         )
+        if self.stats_var.get():
+            self.stats_label.config(text=f"Generator so far: {self.generator_stats.summary()}")
+
+    def _puzzle_failed(self, error):
+        self.puzzle_task = None
+        self.status_label.config(text="Could not generate a puzzle; try New Game")
+        raise error
 
     def render_board(self):
-        for i in range(9):
-            for j in range(9):
-                cell = self.cells[i][j]
-                cell.config(state="normal")
-                cell.delete(0, tk.END)
-
-                if self.board[i][j] != 0:
-                    cell.insert(0, str(self.board[i][j]))
-                    if self.initial_board[i][j] != 0:
-                        cell.config(fg="black", state="disabled")
-                    else:
-                        cell.config(fg="blue")
+        self.view.render(self.board, self.initial_board)
 
     def show_hint(self):
-        solved = self.solve_dp(self.board)
-        if not solved:
+        # Solved off the Tk thread like the AI's moves, so a hard position
+        # never freezes the window. A newer hint request replaces this one.
+        if self.game_over:
             return
-
-        for r in range(9):
-            for c in range(9):
+        if self.hint_task is not None:
+            self.hint_task.cancel()
+        snapshot = self.board.copy()
+        self.hint_task = AITask(self.root, self.position_search(),
+                                lambda solved: self._show_hint_result(snapshot, solved)).start()
+
+    def _show_hint_result(self, snapshot, solved):
+        self.hint_task = None
+        if not solved or snapshot != self.board:
+            return # unsolvable, or the board changed while we were solving
+
+        for r in range(self.size):
+            for c in range(self.size):
                 if self.board[r][c] == 0:
                     messagebox.showinfo(
                         "Hint",
-                        f"Row {r+1}, Col {c+1} = {solved[r][c]}"
+                        f"Row {r+1}, Col {c+1} = {symbol(solved[r][c])}"
                     )
                     return
 
+    def on_stats_toggle(self):
+        self.collect_stats = self.stats_var.get()
+        self.stats_label.config(text="")
+
+    def show_search_stats(self, label, stats):
+        # Stats line under the board; `stats` is None while stats are off
+        if stats is None:
+            return
+        text = stats.summary() if stats.nodes else "answered from the solution cache"
+        self.stats_label.config(text=f"{label}: {text}")
+
     def reset_board(self):
-        self.board = copy.deepcopy(self.initial_board)
+        if self.puzzle_task is not None:
+            return # no puzzle yet
+        self.cancel_ai()
+        self.board = self.initial_board.copy()
         self.game_over = False
+        self.solver.load(self.board)
         self.render_board()
 
+    def on_close(self):
+        # Persist unused prefetched puzzles for the next session
+        self.puzzles.stop()
+        self.root.destroy()
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sudoku duel against the DP AI.")
+    parser.add_argument("--size", type=int, choices=SIZES, default=9, help="grid size n (n x n board)")
+    parser.add_argument("--library", help="packed 9x9 puzzle library to draw puzzles from (sudoku_library.py)")
+    parser.add_argument("--solver", choices=SOLVERS, default="dp",
+                        help="backend for the AI, hints and puzzle generation (dlx: 9x9 only)")
+    args = parser.parse_args()
+    if args.solver == "dlx" and args.size != 9:
+        parser.error("the dlx solver handles 9x9 grids only")
+    SudokuDuel.SOLVER = SOLVERS[args.solver]
+    library = None
+    if args.library:
+        if args.size != 9:
+            parser.error("puzzle libraries hold 9x9 puzzles only")
+        try:
+            library = PuzzleLibrary(args.library)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
     root = tk.Tk()
-    SudokuDuel(root)
+    SudokuDuel(root, args.size, library)
     root.mainloop()
\ No newline at end of file
@@ -13,32 +13,197 @@
 
 import tkinter as tk
 from tkinter import messagebox
-import heapq
+import argparse
 import random
-import copy
+import os
+from sudoku_board import Board, parse_symbol, symbol
+from sudoku_canvas import BoardCanvas
+from sudoku_logic import SIZES, geometry, geometry_of, masks_from_cells, propagate, undo
+from sudoku_prefetch import PuzzlePool
+from sudoku_queue import MRVQueue
+from sudoku_rating import HOLE_FRACTIONS, generate_in_band
+from sudoku_worker import AITask
+
+
+# -------------------------------------------------------------------------
+#  GREEDY SOLVER
+# -------------------------------------------------------------------------
+# Kept at module level (no GUI state) so the AI's move policy can also be
+# run headlessly, e.g. by sudoku_bench.py.
+#
+# The AI never undoes a move it has played, so a bad digit can strand the
+# game. To stay out of dead ends it orders a cell's digits by least-
+# constraining value and, before committing one, looks ahead on the board:
+# propagate() (singles + locked candidates) must not hit a contradiction,
+# and with LOOKAHEAD > 1 the next most constrained cell must keep a digit
+# that survives the remaining levels. Forced cells skip all of this.
+# Every function takes its grid size from the board it is given.
+
+# Lookahead depth: 0 = peers only, 1 = propagation, n = n - 1 further branches
+LOOKAHEAD = 1
+
+def get_candidates(board, row, col):
+    geo = geometry(board.size)
+    i = row * geo.size + col
+    cells = board.cells
+    if cells[i] != 0: return frozenset()
+    return geo.digits.difference(geo.peer_values[i](cells))
+
+
+def order_values(board, row, col, candidates):
+    """
+    Digits for (row, col), least constraining first.
+
+    A digit costs one for every empty peer that also allows it (that peer
+    loses an option). Digits that would leave some peer with no option at
+    all are dropped. Ties are broken at random so games vary.
+    """
+    geo = geometry(board.size)
+    cells = board.cells
+    cell = row * geo.size + col
+    digits, peer_values = geo.digits, geo.peer_values
+    peers = [digits.difference(peer_values[p](cells)) for p in geo.peers[cell] if cells[p] == 0]
+    values = list(candidates)
+    random.shuffle(values)
+    scored = []
+    for v in values:
+        cost = 0
+        for cand in peers:
+            if v in cand:
+                if len(cand) == 1:
+                    break
+                cost += 1
+        else:
+            scored.append((cost, v))
+    scored.sort(key=lambda item: item[0])
+    return [v for _, v in scored]
+
+
+def _survives(cells, depth, check=None, geo=None, stats=None):
+    # True if the position passes `depth` levels of lookahead: propagation
+    # finds no contradiction, then (depth > 1) some digit of the most
+    # constrained remaining cell survives depth - 1. `cells` is restored.
+    if check is not None:
+        check()
+    if stats is not None:
+        stats.probes += 1
+    if geo is None:
+        geo = geometry_of(cells)
+    rows, cols, boxes, empty_cells = masks_from_cells(cells, geo)
+    trail = []
+    ok = propagate(cells, rows, cols, boxes, empty_cells, [0] * geo.ncells, trail, geo)
+    if ok and depth > 1 and empty_cells:
+        popcount = geo.popcount
+        best = -1
+        best_free = 0
+        best_count = geo.size + 1
+        for i in empty_cells:
+            free = geo.full_mask & ~(rows[geo.cell_row[i]] | cols[geo.cell_col[i]] | boxes[geo.cell_box[i]])
+            if popcount[free] < best_count:
+                best, best_free, best_count = i, free, popcount[free]
+        ok = False
+        for v, _ in geo.candidates[best_free]:
+            cells[best] = v
+            ok = _survives(cells, depth - 1, check, geo, stats)
+            cells[best] = 0
+            if ok:
+                break
+    undo(cells, rows, cols, boxes, empty_cells, trail, geo)
+    return ok
+
+
+def choose_value(board, row, col, candidates, check=None, lookahead=LOOKAHEAD, stats=None):
+    # The digit the AI plays at (row, col): the least constraining one that
+    # passes the lookahead. `board` is used as scratch space and restored;
+    # `stats` (SearchStats) counts the lookahead probes.
+    if len(candidates) == 1:
+        return next(iter(candidates))
+    ordered = order_values(board, row, col, candidates)
+    if not ordered:
+        # Every digit empties some peer: the position is lost whatever we play
+        return random.choice(list(candidates))
+    if lookahead <= 0:
+        return ordered[0]
+    geo = geometry(board.size)
+    cells = board.cells
+    cell = row * geo.size + col
+    for v in ordered:
+        cells[cell] = v
+        ok = _survives(cells, lookahead, check, geo, stats)
+        cells[cell] = 0
+        if ok:
+            return v
+    return ordered[0]
+
+
+def solve_greedy(board_snapshot, check=None, lookahead=LOOKAHEAD, stats=None):
+    # Plays the AI's policy to the end on a copy: fill the most constrained
+    # cell with choose_value, never undo. Returns the filled board, or None
+    # once some empty cell has no legal digit left. `check`, if given, is
+    # called before every move and may raise to abort. `stats` counts one
+    # node per move and the lookahead probes separately.
+    board = Board(board_snapshot)
+    cells = board.cells
+    geo = geometry(board.size)
+    n = geo.size
+    digits, peers, peer_values = geo.digits, geo.peers, geo.peer_values
+    pq = MRVQueue(n)
+    for i in range(n * n):
+        if cells[i] == 0:
+            pq.update(i, len(digits.difference(peer_values[i](cells))))
+    while pq:
+        if check is not None:
+            check()
+        cell, count = pq.peek()
+        if count == 0:
+            return None
+        if stats is not None:
+            stats.nodes += 1
+        row, col = divmod(cell, n)
+        cells[cell] = choose_value(board, row, col, get_candidates(board, row, col), check, lookahead, stats)
+        for i in (cell,) + peers[cell]:
+            if cells[i] == 0:
+                pq.update(i, len(digits.difference(peer_values[i](cells))))
+            else:
+                pq.discard(i)
+    return board
+
 
 class SudokuDuel:
     STRICT_MODE = False  # If True, user can only enter correct solution values
+    AI_DELAY_MS = 300  # Pause before the AI replies to a user move
+    AI_TIMEOUT = 5.0  # AI move runs off the Tk thread; give up after this many seconds
 
-    def __init__(self, root):
+    def __init__(self, root, size=9):
         self.root = root
-        self.root.title("Sudoku Duel — User vs Greedy AI")
-        self.root.geometry("600x700")
+        # Grid size n: an n x n board of sqrt(n) x sqrt(n) boxes
+        self.size = size
+        self.geo = geometry(size)
+        self.root.title("Sudoku Duel — User vs Greedy AI" if size == 9 else
+                        f"Sudoku Duel — User vs Greedy AI ({size}x{size})")
+        if size == 9:
+            self.root.geometry("600x700")
         self.root.configure(bg="#ffffff")
         
         # Game state
-        self.board = [[0]*9 for _ in range(9)]
-        self.initial_board = [[0]*9 for _ in range(9)]
+        self.board = Board(size=size)
+        self.initial_board = Board(size=size)
         self.current_turn = "user"
-        self.cells = [[None]*9 for _ in range(9)]
-        self.cell_colors = [[None]*9 for _ in range(9)]
+        self.ai_task = None  # In-flight background AI move (None when idle)
+        self.puzzle_task = None  # In-flight puzzle generation (None when idle)
+        self.pq = MRVQueue(size)  # Empty cells by candidate count
+
+        # Ready-made puzzles, refilled in the background (this duel has a
+        # single difficulty level)
+        pool_file = "greedy_puzzles.json" if size == 9 else f"greedy_puzzles_{size}.json"
+        self.puzzles = PuzzlePool(self.make_puzzle, difficulties=("Default",),
+                                  path=os.path.join(os.path.expanduser("~"), ".sudoku_duel", pool_file))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Create GUI
         self.create_widgets()
         self.new_game()
-
-        # initialise priority queue
-        self.pq = []
+        self.puzzles.start()
     
     def create_widgets(self):
         self.status_label = tk.Label(self.root, text="User's Turn", 
@@ -49,18 +214,8 @@ class SudokuDuel:
         board_frame = tk.Frame(self.root, bg="#d0d0d0", bd=4, relief=tk.SUNKEN)
         board_frame.pack(pady=10)
         
-        for i in range(9):
-            for j in range(9):
-                pady_top = 2 if i % 3 == 0 and i != 0 else 0
-                padx_left = 2 if j % 3 == 0 and j != 0 else 0
-                
-                cell = tk.Entry(board_frame, width=3, font=("Helvetica", 20, "bold"),
-                                justify="center", bd=1, relief=tk.SOLID,
-                                bg="white", disabledbackground="white",
-                                disabledforeground="black")
-                cell.grid(row=i, column=j, padx=(padx_left, 0), pady=(pady_top, 0))
-                cell.bind("<KeyRelease>", lambda e, r=i, c=j: self.on_cell_edit(r, c))
-                self.cells[i][j] = cell
+        self.view = BoardCanvas(board_frame, self.size, self.on_cell_edit)
+        self.view.pack()
         
         button_frame = tk.Frame(self.root, bg="#ffffff")
         
@@ -81,138 +236,164 @@ class SudokuDuel:
         tk.Button(button_frame, text="Reset", command=self.reset_board,
                   font=("Helvetica", 12), bg="#FF9800", fg="white").grid(row=0, column=3, padx=5)
 
-    def generate_puzzle(self):
-        full_board = self.shuffle_board(self.get_base_pattern())
-        self.solution_board = copy.deepcopy(full_board)
-        self.board = copy.deepcopy(full_board)
-        cells = [(i, j) for i in range(9) for j in range(9)]
-        random.shuffle(cells)
-        for i in range(random.randint(40, 45)):
-            r, c = cells[i]
-            self.board[r][c] = 0
-        return self.board
+    def make_puzzle(self, difficulty):
+        # Pure generator (no widget/game state): safe on the prefetch thread.
+        # Returns (puzzle, solution). The single "Default" level uses the
+        # Easy band: every hole can be filled by singles, which the greedy AI
+        # finds without guessing.
+        new_grid = lambda: Board(self.shuffle_board(self.get_base_pattern()))
+        if self.size != 9:
+            # No technique rating off 9x9: random holes, the Easy share
+            ncells = self.geo.ncells
+            solution = new_grid()
+            board = solution.copy()
+            for i in random.sample(range(ncells), round(ncells * HOLE_FRACTIONS[self.size]["Easy"])):
+                board.cells[i] = 0
+            return board, solution
+        return generate_in_band(new_grid, "Easy", random.randint(40, 45))
     
     def get_base_pattern(self):
-        def pattern(r, c): return (3 * (r % 3) + r // 3 + c) % 9
-        nums = list(range(1, 10))
+        n, box = self.size, self.geo.box
+        def pattern(r, c): return (box * (r % box) + r // box + c) % n
+        nums = list(range(1, n + 1))
         random.shuffle(nums)
-        return [[nums[pattern(r, c)] for c in range(9)] for r in range(9)]
+        return [[nums[pattern(r, c)] for c in range(n)] for r in range(n)]
 
     def shuffle_board(self, board):
-        for i in range(0, 9, 3):
-            block = board[i:i+3]
+        n, box = self.size, self.geo.box
+        for i in range(0, n, box):
+            block = board[i:i+box]
             random.shuffle(block)
-            board[i:i+3] = block
+            board[i:i+box] = block
         board = list(map(list, zip(*board)))
-        for i in range(0, 9, 3):
-            block = board[i:i+3]
+        for i in range(0, n, box):
+            block = board[i:i+box]
             random.shuffle(block)
-            board[i:i+3] = block
+            board[i:i+box] = block
         board = list(map(list, zip(*board)))
-        bands = [board[i:i+3] for i in range(0, 9, 3)]
+        bands = [board[i:i+box] for i in range(0, n, box)]
         random.shuffle(bands)
         board = [row for band in bands for row in band]
         board = list(map(list, zip(*board)))
-        stacks = [board[i:i+3] for i in range(0, 9, 3)]
+        stacks = [board[i:i+box] for i in range(0, n, box)]
         random.shuffle(stacks)
         board = [row for stack in stacks for row in stack]
         board = list(map(list, zip(*board)))
         return board
 
     def is_valid(self, board, row, col, num):
-        if num in board[row]: return False
-        if num in [board[i][col] for i in range(9)]: return False
-        br, bc = 3 * (row // 3), 3 * (col // 3)
-        for i in range(br, br + 3):
-            for j in range(bc, bc + 3):
-                if board[i][j] == num: return False
-        return True
+        return num not in self.geo.peer_values[row * self.size + col](board.cells)
 
     def get_candidates(self, board, row, col):
-        if board[row][col] != 0: return set()
-        candidates = set(range(1, 10))
-        candidates -= set(board[row])
-        candidates -= {board[i][col] for i in range(9)}
-        br, bc = 3 * (row // 3), 3 * (col // 3)
-        for i in range(br, br + 3):
-            for j in range(bc, bc + 3):
-                candidates.discard(board[i][j])
-        return candidates
+        return get_candidates(board, row, col)
 
     def initialize_priority_queue(self):
-        self.pq = []
-        for i in range(9):
-            for j in range(9):
+        self.pq.clear()
+        n = self.size
+        for i in range(n):
+            for j in range(n):
                 if self.board[i][j] == 0:
                     c = self.get_candidates(self.board, i, j)
-                    if c:
-                        heapq.heappush(self.pq, (len(c), i, j, c))
+                    self.pq.update(i * n + j, len(c))
 
     def update_neighbors(self, row, col):
-        neighbours = set()
-        for i in range(9):
-            neighbours.add((row, i))
-            neighbours.add((i, col))
-        br, bc = 3 * (row // 3), 3 * (col // 3)
-        for i in range(br, br + 3):
-            for j in range(bc, bc + 3):
-                neighbours.add((i, j))
-        for r, c in neighbours:
-            if self.board[r][c] == 0:
-                cand = self.get_candidates(self.board, r, c)
-                if cand:
-                    heapq.heappush(self.pq, (len(cand), r, c, cand))
-
-    def ai_make_move(self):
-        while self.pq:
-            _, row, col, _ = heapq.heappop(self.pq)
-            if self.board[row][col] != 0:
-                continue
-            candidates = self.get_candidates(self.board, row, col)
-            if not candidates:
-                return False
-            value = random.choice(list(candidates))
-            self.board[row][col] = value
-            self.cells[row][col].config(state="normal")
-            self.cells[row][col].delete(0, tk.END)
-            self.cells[row][col].insert(0, str(value))
-            self.cells[row][col].config(fg="red", state="disabled")
-            self.update_neighbors(row, col)
-            return True
-        return False
+        # Re-rank (row, col) and its peers after that cell was filled or cleared
+        cells = self.board.cells
+        cell = row * self.size + col
+        for i in (cell,) + self.geo.peers[cell]:
+            if cells[i] == 0:
+                r, c = divmod(i, self.size)
+                self.pq.update(i, len(self.get_candidates(self.board, r, c)))
+            else:
+                self.pq.discard(i)
+
+    def ai_make_move(self, on_done):
+        # Picks the MRV cell on the Tk thread, chooses its value on a worker
+        # thread, then calls on_done(moved) back on the Tk thread.
+        # The cell stays queued until the move lands (update_neighbors drops it)
+        item = self.pq.peek()
+        if item is None or item[1] == 0:
+            on_done(False)  # board full, or some cell has no legal digit
+            return
+        row, col = divmod(item[0], self.size)
+        candidates = self.get_candidates(self.board, row, col)
+        snapshot = self.board.copy()
+        self.ai_task = AITask(self.root,
+                              lambda check: self.choose_value(snapshot, row, col, candidates, check),
+                              lambda value: self._ai_apply_move(row, col, value, on_done),
+                              on_timeout=self._ai_timed_out,
+                              on_error=self._ai_failed,
+                              timeout=self.AI_TIMEOUT).start()
+
+    def choose_value(self, board, row, col, candidates, check):
+        # Worker thread: pick the digit to play at (row, col)
+        return choose_value(board, row, col, candidates, check)
+
+    def _ai_apply_move(self, row, col, value, on_done):
+        self.ai_task = None
+        self.board[row][col] = value
+        self.view.set(row, col, symbol(value), fg="red", locked=True)
+        self.update_neighbors(row, col)
+        on_done(True)
+
+    def _ai_timed_out(self):
+        self.ai_task = None
+        self.current_turn = "user"
+        self.status_label.config(text="User's Turn")
+        messagebox.showinfo("AI", "The AI ran out of time on this position. Your move!")
+
+    def _ai_failed(self, error):
+        # The search raised: hand the turn back so later AI turns still run,
+        # then let Tk report the error
+        self.ai_task = None
+        self.current_turn = "user"
+        self.status_label.config(text="User's Turn")
+        raise error
+
+    def cancel_ai(self):
+        # Drop any in-flight AI move (Reset / New Game)
+        if self.ai_task is not None:
+            self.ai_task.cancel()
+            self.ai_task = None
 
     def on_cell_edit(self, row, col):
         if self.current_turn != "user" or self.initial_board[row][col] != 0:
             return
-        cell = self.cells[row][col]
-        v = cell.get().strip()
+        v = self.view.get(row, col).strip()
         if v == "":
             self.board[row][col] = 0
+            self.update_neighbors(row, col)
             return
         try:
-            num = int(v)
-            if not (1 <= num <= 9): raise ValueError
+            num = parse_symbol(v, self.size)
             self.board[row][col] = 0
             # Strict mode: must match solution
             if self.STRICT_MODE and num != self.solution_board[row][col]:
                 messagebox.showerror("Incorrect", "That is not the correct value for this cell.")
-                cell.delete(0, tk.END)
+                self.view.set(row, col, "")
+                self.update_neighbors(row, col)
                 return
 
             if self.is_valid(self.board, row, col, num):
                 self.board[row][col] = num
                 self.update_neighbors(row, col)
-                cell.config(fg="blue")
+                self.view.set(row, col, fg="blue")
                 self.current_turn = "ai"
                 self.status_label.config(text="AI is Thinking...")
-                self.root.after(300, self.ai_turn)
+                self.root.after(self.AI_DELAY_MS, self.ai_turn)
             else:
-                cell.delete(0, tk.END)
+                self.view.set(row, col, "")
+                self.update_neighbors(row, col)
         except ValueError:
-            cell.delete(0, tk.END)
+            self.view.set(row, col, "")
 
     def ai_turn(self):
-        if not self.ai_make_move():
+        if self.ai_task is not None:
+            return
+        self.ai_make_move(self._ai_turn_done)
+
+    def _ai_turn_done(self, moved):
+        if not moved:
             messagebox.showinfo("Game Over", "AI cannot make a move!")
             return
         if self.is_complete():
@@ -222,53 +403,84 @@ class SudokuDuel:
         self.status_label.config(text="User's Turn")
 
     def is_complete(self):
-        return all(self.board[i][j] != 0 for i in range(9) for j in range(9))
+        return all(self.board.cells)
 
     def new_game(self):
-        self.board = self.generate_puzzle()
-        self.initial_board = copy.deepcopy(self.board)
+        self.cancel_ai()
+        if self.puzzle_task is not None:
+            self.puzzle_task.cancel()
+            self.puzzle_task = None
+        item = self.puzzles.take("Default")
+        if item is not None:
+            self._start_game(item)
+            return
+
+        # Nothing prefetched yet: generate off the Tk thread (retrying grids
+        # until one rates Easy can take a few hundred ms) on an empty,
+        # locked board
+        self.board = Board(size=self.size)
+        self.initial_board = self.board.copy()
+        self.current_turn = "user"
+        self.pq.clear()
+        self.render_board()
+        self.view.lock_all()
+        self.status_label.config(text="Generating a puzzle...")
+        self.puzzle_task = AITask(self.root, lambda check: self.make_puzzle("Default"),
+                                  self._start_game, on_error=self._puzzle_failed).start()
+
+    def _start_game(self, item):
+        self.puzzle_task = None
+        self.board, self.solution_board = item
+        self.initial_board = self.board.copy()
         self.current_turn = "user"
         self.initialize_priority_queue()
         self.render_board()
         self.status_label.config(text="User's Turn")
 
+    def _puzzle_failed(self, error):
+        self.puzzle_task = None
+        self.status_label.config(text="Could not generate a puzzle; try New Game")
+        raise error
+
     def render_board(self):
-        for i in range(9):
-            for j in range(9):
-                cell = self.cells[i][j]
-                cell.config(state="normal")
-                cell.delete(0, tk.END)
-                if self.board[i][j] != 0:
-                    cell.insert(0, str(self.board[i][j]))
-                    if self.initial_board[i][j] != 0:
-                        cell.config(fg="black", state="disabled")
-                    else:
-                        cell.config(fg="blue")
+        self.view.render(self.board, self.initial_board)
 
     def show_hint(self):
-        self.initialize_priority_queue()
+        if self.puzzle_task is not None:
+            return # no puzzle yet
         if not self.pq:
             messagebox.showinfo("Hint", "No empty cells remaining!")
             return
-        _, row, col, _ = self.pq[0]
-        for i in range(9):
-            for j in range(9):
-                self.cells[i][j].config(bg="white")
-        self.cells[row][col].config(bg="#ffeb3b")
+        row, col = divmod(self.pq.peek()[0], self.size)
+        self.view.highlight(row, col)
         cand = sorted(self.get_candidates(self.board, row, col))
+        if self.size > 9:
+            cand = [symbol(v) for v in cand] # digits past 9 show as letters
         messagebox.showinfo("Hint", f"Most constrained cell: Row {row+1}, Col {col+1}\nCandidates: {cand}")
 
     def ai_play(self):
-        self.ai_make_move()
+        if self.ai_task is None:
+            self.ai_make_move(lambda moved: None)
 
     def reset_board(self):
-        self.board = copy.deepcopy(self.initial_board)
+        if self.puzzle_task is not None:
+            return # no puzzle yet
+        self.cancel_ai()
+        self.board = self.initial_board.copy()
         self.current_turn = "user"
         self.initialize_priority_queue()
         self.render_board()
         self.status_label.config(text="User's Turn")
 
+    def on_close(self):
+        # Persist unused prefetched puzzles for the next session
+        self.puzzles.stop()
+        self.root.destroy()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sudoku duel against the greedy AI.")
+    parser.add_argument("--size", type=int, choices=SIZES, default=9, help="grid size n (n x n board)")
+    args = parser.parse_args()
     root = tk.Tk()
-    SudokuDuel(root)
+    SudokuDuel(root, args.size)
     root.mainloop()
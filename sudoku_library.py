@@ -0,0 +1,326 @@
+# Packed binary puzzle library with random access by difficulty.
+#
+# A library file holds 9x9 puzzles with their solutions, sorted by
+# difficulty band (sudoku_rating.BANDS) and then by clue count:
+#
+#     header   "SDKL", version, grid size, index entries, record count
+#     index    one entry per (band, clue count) group: first record, count
+#     records  52 bytes each: the solution at 4 bits per cell (41 bytes),
+#              then a bitmap of the clue cells (81 bits, 11 bytes)
+#
+# The puzzle is the solution masked by the clue bitmap, so a million
+# puzzles with their solutions take 52 MB. PuzzleLibrary maps the file and
+# decodes a record on demand, so picking a random puzzle of a band takes a
+# few microseconds and nothing but the index is read up front.
+#
+# Usage:
+#     python sudoku_library.py build library.sdl puzzles.txt [more.txt ...]
+#     python sudoku_library.py info library.sdl
+#     python sudoku_library.py pick library.sdl Hard [--clues 22-25]
+#
+# build takes one puzzle per line, or sudoku_batch.py output (puzzle, tab,
+# solution, ...). Every puzzle is checked for a unique solution and rated;
+# the rest are skipped. Puzzles equivalent to one already kept (a relabeling,
+# row/column permutation or transpose of it, see sudoku_canon.py) are
+# skipped too.
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from multiprocessing import Pool
+
+from sudoku_board import Board, as_board
+from sudoku_canon import canonical_key
+from sudoku_rating import BANDS, band_of, rate
+
+MAGIC = b"SDKL"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHI") # magic, version, grid size, index entries, records
+INDEX_ENTRY = struct.Struct("<BBII") # band, clues, first record, record count
+PACKED_CELLS = 41 # 81 cells at 4 bits
+CLUE_BYTES = 11 # 81-bit clue bitmap
+RECORD_SIZE = PACKED_CELLS + CLUE_BYTES
+
+BAND_NAMES = tuple(BANDS) # band id in the file -> name
+
+# Byte -> its two cells, and bitmap byte -> 8 cell masks (0xFF = clue)
+_NIBBLES = [bytes((b >> 4, b & 15)) for b in range(256)]
+_CLUE_MASKS = [bytes(0xFF if b >> k & 1 else 0 for k in range(8)) for b in range(256)]
+
+
+# --------------------------------------------------
+# Records
+# --------------------------------------------------
+
+def pack(puzzle, solution):
+    """52-byte record for a 9x9 puzzle and its solution."""
+    puzzle, solution = as_board(puzzle), as_board(solution)
+    if puzzle.size != 9 or solution.size != 9:
+        raise ValueError("only 9x9 puzzles can be stored in a library")
+    s = solution.cells + b"\0"
+    clues = 0
+    for i, v in enumerate(puzzle.cells):
+        if v:
+            if v != s[i]:
+                raise ValueError("puzzle clue does not match its solution")
+            clues |= 1 << i
+    packed = bytes((s[i] << 4) | s[i + 1] for i in range(0, 82, 2))
+    return packed + clues.to_bytes(CLUE_BYTES, "little")
+
+
+def unpack(record):
+    """(puzzle, solution) Boards from a record."""
+    solution = b"".join([_NIBBLES[b] for b in record[:PACKED_CELLS]])[:81]
+    mask = b"".join([_CLUE_MASKS[b] for b in record[PACKED_CELLS:RECORD_SIZE]])[:81]
+    puzzle = (int.from_bytes(solution, "big") & int.from_bytes(mask, "big")).to_bytes(81, "big")
+    return Board(puzzle), Board(solution)
+
+
+def clue_count(record):
+    return int.from_bytes(record[PACKED_CELLS:RECORD_SIZE], "little").bit_count()
+
+
+# --------------------------------------------------
+# Writing
+# --------------------------------------------------
+
+def write_library(path, items):
+    """
+    Write a library file from (puzzle, solution, band) triples.
+
+    Records are grouped in memory by (band, clue count), 52 bytes each, and
+    written sorted. The file is written aside and renamed into place, so
+    readers never see a half-written library.
+
+    Returns:
+        int: Number of puzzles written.
+    """
+    groups = {} # (band id, clues) -> packed records
+    for puzzle, solution, band in items:
+        record = pack(puzzle, solution)
+        key = (BAND_NAMES.index(band), clue_count(record))
+        groups.setdefault(key, bytearray()).extend(record)
+
+    index = []
+    first = 0
+    for key in sorted(groups):
+        count = len(groups[key]) // RECORD_SIZE
+        index.append((*key, first, count))
+        first += count
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 9, len(index), first))
+        for entry in index:
+            f.write(INDEX_ENTRY.pack(*entry))
+        for key in sorted(groups):
+            f.write(groups[key])
+    os.replace(tmp_path, path)
+    return first
+
+
+# --------------------------------------------------
+# Reading
+# --------------------------------------------------
+
+class PuzzleLibrary:
+    def __init__(self, path):
+        """
+        Open a library file for random access (memory-mapped, read-only).
+
+        Raises:
+            ValueError: if the file is not a library this version can read.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # empty file
+                raise ValueError(f"{path}: not a puzzle library") from None
+        try:
+            magic, version, size, entries, count = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = None
+        if magic != MAGIC or version != VERSION or size != 9:
+            self._map.close()
+            raise ValueError(f"{path}: not a version {VERSION} puzzle library")
+
+        # band -> [(clues, first record, count)], sorted by clue count
+        self.groups = {name: [] for name in BAND_NAMES}
+        for k in range(entries):
+            band, clues, first, n = INDEX_ENTRY.unpack_from(self._map, HEADER.size + k * INDEX_ENTRY.size)
+            self.groups[BAND_NAMES[band]].append((clues, first, n))
+        self._records = HEADER.size + entries * INDEX_ENTRY.size
+        self._count = count
+        if len(self._map) != self._records + count * RECORD_SIZE:
+            self._map.close()
+            raise ValueError(f"{path}: truncated puzzle library")
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        """(puzzle, solution) of record i."""
+        if not 0 <= i < self._count:
+            raise IndexError("puzzle library index out of range")
+        start = self._records + i * RECORD_SIZE
+        return unpack(self._map[start:start + RECORD_SIZE])
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _ranges(self, band, min_clues=None, max_clues=None):
+        low = 0 if min_clues is None else min_clues
+        high = 81 if max_clues is None else max_clues
+        return [(first, n) for clues, first, n in self.groups.get(band, ()) if low <= clues <= high]
+
+    def count(self, band, min_clues=None, max_clues=None):
+        """Number of puzzles in a band, optionally within a clue-count range."""
+        return sum(n for _, n in self._ranges(band, min_clues, max_clues))
+
+    def random(self, band, min_clues=None, max_clues=None, rng=random):
+        """
+        A random (puzzle, solution) pair from a band (and clue-count range).
+
+        Returns:
+            tuple[Board, Board] | None: None if the library has no such puzzle.
+        """
+        ranges = self._ranges(band, min_clues, max_clues)
+        k = rng.randrange(sum(n for _, n in ranges)) if ranges else None
+        for first, n in ranges:
+            if k < n:
+                return self[first + k]
+            k -= n
+        return None
+
+
+# --------------------------------------------------
+# Building from puzzle files
+# --------------------------------------------------
+
+def _solves(puzzle, solution):
+    # A grid parse_puzzle accepted has no repeated digits, so it is a valid
+    # solution of `puzzle` if it is complete and keeps every clue
+    if solution.size != puzzle.size or 0 in solution.cells:
+        return False
+    return all(not p or p == v for p, v in zip(puzzle.cells, solution.cells))
+
+
+def _prepare_line(line):
+    # Runs inside a pool worker: (puzzle, solution, band, canonical key), or
+    # None for a line that is not a uniquely solvable 9x9 puzzle
+    from sudoku_batch import parse_puzzle
+    from sudoku_dp import BitmaskSolver
+
+    fields = line.split("\t")
+    try:
+        puzzle = parse_puzzle(fields[0])
+    except ValueError:
+        return None
+    if puzzle.size != 9 or BitmaskSolver().count_solutions(puzzle.copy(), 2) != 1:
+        return None
+    try:
+        solution = parse_puzzle(fields[1])
+    except (IndexError, ValueError): # no solution column, "unsolvable", or conflicting digits
+        solution = None
+    if solution is None or not _solves(puzzle, solution):
+        solution = BitmaskSolver().solve(puzzle.copy())
+    rating = rate(puzzle)
+    return puzzle, solution, band_of(rating), canonical_key(puzzle)
+
+
+def prepare(lines, workers=None, chunksize=256):
+    """
+    Yield (puzzle, solution, band) for every usable puzzle line, checked and
+    rated over a process pool. Only the first of several equivalent puzzles
+    is yielded.
+    """
+    seen = set() # canonical keys of the puzzles yielded so far
+    for item in _prepare_all(lines, workers, chunksize):
+        if item is not None and item[3] not in seen:
+            seen.add(item[3])
+            yield item[:3]
+
+
+def _prepare_all(lines, workers, chunksize):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(_prepare_line, lines)
+        return
+
+    with Pool(processes=workers) as pool:
+        yield from pool.imap(_prepare_line, lines, chunksize=chunksize)
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+
+def main(argv=None):
+    from sudoku_batch import read_puzzles
+
+    parser = argparse.ArgumentParser(description="Build and query packed Sudoku puzzle libraries.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="pack puzzle files into a library")
+    build.add_argument("library")
+    build.add_argument("inputs", nargs="+", help="files with one puzzle (or batch output line) per line")
+    build.add_argument("-j", "--workers", type=int, default=None,
+                       help="worker processes (default: number of cores)")
+    info = commands.add_parser("info", help="puzzle counts per band and clue count")
+    info.add_argument("library")
+    pick = commands.add_parser("pick", help="print random puzzles from a band")
+    pick.add_argument("library")
+    pick.add_argument("band", choices=BAND_NAMES)
+    pick.add_argument("--clues", help="clue-count range, e.g. 22-25")
+    pick.add_argument("-n", type=int, default=1, help="number of puzzles")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        lines = (line for path in args.inputs for line in read_puzzles(path))
+        count = write_library(args.library, prepare(lines, args.workers))
+        print(f"{count} puzzles written to {args.library} in {time.perf_counter() - start:.2f}s "
+              f"({os.path.getsize(args.library)} bytes)", file=sys.stderr)
+        return 0
+
+    try:
+        library = PuzzleLibrary(args.library)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    with library:
+        if args.command == "info":
+            print(f"{len(library)} puzzles")
+            for band, groups in library.groups.items():
+                if groups:
+                    clues = ", ".join(f"{c}: {n}" for c, _, n in groups)
+                    print(f"{band:<8}{library.count(band):>9}  by clues: {clues}")
+            return 0
+
+        low = high = None
+        if args.clues:
+            low, _, high = args.clues.partition("-")
+            low, high = int(low), int(high or low)
+        start = time.perf_counter()
+        picked = [library.random(args.band, low, high) for _ in range(args.n)]
+        elapsed_us = (time.perf_counter() - start) * 1e6 / max(args.n, 1)
+        if picked and picked[0] is None:
+            print(f"no {args.band} puzzles in {args.library}", file=sys.stderr)
+            return 1
+        for puzzle, solution in picked:
+            print(f"{puzzle.to_line()}\t{solution.to_line()}")
+        print(f"{elapsed_us:.1f} us/puzzle", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
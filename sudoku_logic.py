@@ -0,0 +1,308 @@
+# Shared bitmask tables and logical constraint propagation.
+#
+# No GUI imports here, so every solver (BitmaskSolver in sudoku_dp.py, the
+# D&C solver, batch tools) can use the same tables and deduction rules.
+#
+# Masks: bit k set = digit k+1. Unit masks (rows/cols/boxes) hold the digits
+# already placed in that unit; a cell's candidates are the digits free in all
+# three of its units minus any digits eliminated by locked-candidate rules.
+#
+# Tables come per grid size (Geometry, for 4x4 up to 25x25); the module-level
+# names are the 9x9 ones, and propagate/undo default to them.
+
+from functools import lru_cache
+from math import isqrt
+from operator import itemgetter
+
+# Grid sizes the tables can be built for: n x n grids with sqrt(n) x sqrt(n)
+# boxes, digits 1..n (written 1-9 then A-P, see sudoku_board.py)
+SIZES = (4, 9, 16, 25)
+
+
+# --------------------------------------------------
+# Lookup tables (per grid size)
+# --------------------------------------------------
+
+class _BitCount:
+    # popcount[mask] for masks too wide for a lookup table
+    __slots__ = ()
+    __getitem__ = staticmethod(int.bit_count)
+
+
+class _MaskDigits:
+    # candidates[mask] for masks too wide for a lookup table
+    __slots__ = ("pairs",)
+
+    def __init__(self, size):
+        self.pairs = [(k + 1, 1 << k) for k in range(size)]
+
+    def __getitem__(self, mask):
+        return tuple(pair for pair in self.pairs if mask & pair[1])
+
+
+class Geometry:
+    """
+    Lookup tables for an n x n grid (n in SIZES), flat cell index i = r * n + c.
+
+    Attributes mirror the module-level 9x9 tables below, in lower case:
+    popcount[mask] and candidates[mask] are lists indexed by mask up to 9x9
+    and computed on the fly for wider masks, so solvers index them the same
+    way at every size.
+    """
+
+    def __init__(self, size):
+        box = isqrt(size)
+        if size not in SIZES:
+            raise ValueError(f"unsupported grid size {size} (expected one of {SIZES})")
+        n = size
+        self.size = n
+        self.box = box
+        self.ncells = n * n
+        self.full_mask = (1 << n) - 1
+        if n <= 9:
+            self.popcount = [bin(mask).count("1") for mask in range(1 << n)]
+            self.candidates = [tuple((k + 1, 1 << k) for k in range(n) if mask & (1 << k))
+                               for mask in range(1 << n)]
+        else:
+            self.popcount = _BitCount()
+            self.candidates = _MaskDigits(n)
+        self.box_index = [[(r // box) * box + (c // box) for c in range(n)] for r in range(n)]
+
+        cells = range(n * n)
+        self.cell_row = [i // n for i in cells]
+        self.cell_col = [i % n for i in cells]
+        self.cell_box = [self.box_index[i // n][i % n] for i in cells]
+
+        # 3n units as tuples of flat cell indices: rows, then cols, then boxes
+        self.units = ([tuple(r * n + c for c in range(n)) for r in range(n)] +
+                      [tuple(r * n + c for r in range(n)) for c in range(n)] +
+                      [tuple(i for i in cells if self.cell_box[i] == b) for b in range(n)])
+        self.intersections = self._build_intersections()
+
+        # Per flat cell: the 3 units containing it (indices into units), and
+        # its peers (every other cell sharing a row, column or box)
+        cell_units = [[] for _ in cells]
+        for u, unit in enumerate(self.units):
+            for i in unit:
+                cell_units[i].append(u)
+        self.cell_units = [tuple(units) for units in cell_units]
+        self.peers = [tuple(sorted({j for u in self.cell_units[i] for j in self.units[u]} - {i}))
+                      for i in cells]
+        # peer_values[i](cells) -> values of the peers of cell i, in one C call
+        self.peer_values = [itemgetter(*peers) for peers in self.peers]
+        self.digits = frozenset(range(1, n + 1))
+
+    def _build_intersections(self):
+        # Every (line, box) pair that overlaps in a box-width segment, as
+        # (overlap cells, rest of the line, rest of the box).
+        n = self.size
+        result = []
+        for line in self.units[:2 * n]:
+            line_set = set(line)
+            for box in self.units[2 * n:]:
+                overlap = tuple(i for i in line if i in box)
+                if overlap:
+                    box_set = set(box)
+                    result.append((overlap,
+                                   tuple(i for i in line if i not in box_set),
+                                   tuple(i for i in box if i not in line_set)))
+        return result
+
+    def __repr__(self):
+        return f"Geometry({self.size})"
+
+
+@lru_cache(maxsize=None)
+def geometry(size=9):
+    """Shared Geometry for an n x n grid, built on first use."""
+    return Geometry(size)
+
+
+def geometry_of(cells):
+    """Geometry for a flat cell sequence of n * n cells."""
+    n = isqrt(len(cells))
+    if n * n != len(cells):
+        raise ValueError(f"{len(cells)} cells is not a square grid")
+    return geometry(n)
+
+
+# The classic 9x9 grid. Its tables are also exported under the historical
+# module-level names, which 9x9-only code (DLX, the rater, canonical forms)
+# keeps using directly.
+STANDARD = geometry(9)
+
+# Indexed by a 9-bit candidate mask:
+#   POPCOUNT[mask]   -> number of free digits
+#   CANDIDATES[mask] -> tuple of (digit, bit) pairs for the free digits
+FULL_MASK = STANDARD.full_mask
+POPCOUNT = STANDARD.popcount
+CANDIDATES = STANDARD.candidates
+BOX_INDEX = STANDARD.box_index
+
+# Flat cell index i = r * 9 + c
+CELL_ROW = STANDARD.cell_row
+CELL_COL = STANDARD.cell_col
+CELL_BOX = STANDARD.cell_box
+
+# 27 units as tuples of flat cell indices: rows 0-8, cols 9-17, boxes 18-26
+UNITS = STANDARD.units
+INTERSECTIONS = STANDARD.intersections
+
+# Per flat cell: the 3 units containing it (indices into UNITS), and its 20
+# peers (every other cell sharing a row, column or box)
+CELL_UNITS = STANDARD.cell_units
+PEERS = STANDARD.peers
+# PEER_VALUES[i](cells) -> values of the 20 peers of cell i, in one C call
+PEER_VALUES = STANDARD.peer_values
+DIGITS = STANDARD.digits
+
+
+# --------------------------------------------------
+# Propagation
+# --------------------------------------------------
+
+def masks_from_cells(cells, geo=STANDARD):
+    # Unit masks and empty-cell list (flat indices) for a grid's flat cells
+    n = geo.size
+    cell_row, cell_col, cell_box = geo.cell_row, geo.cell_col, geo.cell_box
+    rows = [0] * n
+    cols = [0] * n
+    boxes = [0] * n
+    empty_cells = []
+    for i in range(geo.ncells):
+        v = cells[i]
+        if v:
+            mask = 1 << (v - 1)
+            rows[cell_row[i]] |= mask
+            cols[cell_col[i]] |= mask
+            boxes[cell_box[i]] |= mask
+        else:
+            empty_cells.append(i)
+    return rows, cols, boxes, empty_cells
+
+
+def propagate(cells, rows, cols, boxes, empty_cells, elim, trail, geo=STANDARD):
+    """
+    Apply logical deductions until nothing changes.
+
+    Rules, cheapest first, restarting from the top after any progress:
+      1. Naked singles: a cell with exactly one candidate.
+      2. Hidden singles: a digit with exactly one possible cell in a unit.
+      3. Locked candidates (pointing / claiming): if a digit's candidates in a
+         box lie on one line, remove it from the rest of that line, and vice
+         versa.
+
+    `cells` is the flat board (Board.cells) and `empty_cells` holds flat
+    indices; `geo` is the grid's Geometry (9x9 by default). Forced digits are
+    written to `cells` and the unit masks, their cells are removed from
+    `empty_cells` and appended to `trail` so the caller can undo them with
+    `undo`. Locked-candidate eliminations are OR-ed into `elim`, a flat list
+    of one mask per cell.
+
+    Returns:
+        bool: False if a contradiction was found (a cell or unit with no
+              place left for a digit), True otherwise.
+    """
+    full_mask, popcount, candidates = geo.full_mask, geo.popcount, geo.candidates
+    cell_row, cell_col, cell_box = geo.cell_row, geo.cell_col, geo.cell_box
+    n = geo.size
+    cand = [0] * geo.ncells
+    while empty_cells:
+        # Current candidates; any empty cell without one is a dead end
+        for i in empty_cells:
+            m = full_mask & ~(rows[cell_row[i]] | cols[cell_col[i]] | boxes[cell_box[i]] | elim[i])
+            if not m:
+                return False
+            cand[i] = m
+
+        forced = {}
+        # 1. Naked singles
+        for i in empty_cells:
+            if popcount[cand[i]] == 1:
+                forced[i] = cand[i]
+
+        # 2. Hidden singles (and units missing a digit entirely)
+        if not forced:
+            for u, unit in enumerate(geo.units):
+                once = more = 0
+                for i in unit:
+                    m = cand[i]
+                    more |= once & m
+                    once |= m
+                if u < n:
+                    placed = rows[u]
+                elif u < 2 * n:
+                    placed = cols[u - n]
+                else:
+                    placed = boxes[u - 2 * n]
+                if (once | placed) != full_mask:
+                    return False
+                hidden = once & ~more
+                if hidden:
+                    for i in unit:
+                        bit = cand[i] & hidden
+                        if bit:
+                            if popcount[bit] > 1 or forced.get(i, bit) != bit:
+                                return False # one cell needs two digits
+                            forced[i] = bit
+
+        if forced:
+            consistent = True
+            for i, bit in forced.items():
+                r, c, b = cell_row[i], cell_col[i], cell_box[i]
+                if (rows[r] | cols[c] | boxes[b]) & bit:
+                    consistent = False # two forced cells claim the same digit
+                    break
+                rows[r] |= bit; cols[c] |= bit; boxes[b] |= bit
+                cells[i] = candidates[bit][0][0]
+                trail.append(i)
+                cand[i] = 0
+            # Keep empty_cells exact even on failure: undo re-appends the trail
+            empty_cells[:] = [i for i in empty_cells if not cells[i]]
+            if not consistent:
+                return False
+            continue
+
+        # 3. Locked candidates
+        changed = False
+        for overlap, line_rest, box_rest in geo.intersections:
+            seg = 0
+            for i in overlap:
+                seg |= cand[i]
+            if not seg:
+                continue
+            outside_box = outside_line = 0
+            for i in line_rest:
+                outside_box |= cand[i]
+            for i in box_rest:
+                outside_line |= cand[i]
+            # Pointing: digit confined to the overlap within the box
+            pointing = seg & ~outside_line & outside_box
+            if pointing:
+                for i in line_rest:
+                    if cand[i] & pointing:
+                        elim[i] |= pointing
+                        cand[i] &= ~pointing
+                        changed = True
+            # Claiming: digit confined to the overlap within the line
+            claiming = seg & ~outside_box & outside_line
+            if claiming:
+                for i in box_rest:
+                    if cand[i] & claiming:
+                        elim[i] |= claiming
+                        cand[i] &= ~claiming
+                        changed = True
+        if not changed:
+            break
+    return True
+
+
+def undo(cells, rows, cols, boxes, empty_cells, trail, geo=STANDARD):
+    # Reverse every placement recorded in `trail` by propagate
+    cell_row, cell_col, cell_box = geo.cell_row, geo.cell_col, geo.cell_box
+    while trail:
+        i = trail.pop()
+        mask = ~(1 << (cells[i] - 1))
+        rows[cell_row[i]] &= mask; cols[cell_col[i]] &= mask; boxes[cell_box[i]] &= mask
+        cells[i] = 0
+        empty_cells.append(i)
@@ -0,0 +1,276 @@
+# Parallel subtree search for single hard puzzles.
+#
+# sudoku_batch.py spreads many puzzles over the cores; this module spreads
+# the search tree of one puzzle. split() expands the tree breadth-first down
+# to a frontier depth, propagating at every node and branching on the most
+# constrained cell like BitmaskSolver does, and every frontier node becomes a
+# job for a process pool:
+#
+#     count_solutions - adds up the subtree counts and stops all workers as
+#                       soon as `limit` is reached
+#     solve           - returns the first subtree solution any worker finds
+#                       and stops the others
+#
+# Branches fix different digits in the same cell and propagation only makes
+# forced moves, so the subtrees split the solution set and their counts add
+# up exactly. Pick a depth that gives several subtrees per worker: MRV cells
+# mostly have 2-3 candidates, so depth 4-6 yields roughly 10-100 jobs.
+#
+# Workers search with ResumableSearch (the same search as BitmaskSolver) in
+# slices of SLICE_NODES nodes and check a shared stop flag between slices,
+# the way the games cancel their AI. A worker is never killed mid-search:
+# terminating a Pool while its task thread is still handing out jobs can
+# hang the parent.
+#
+# Usage:
+#     python sudoku_parallel.py <puzzle line> [--count] [--depth 5] [-j 8]
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+from sudoku_batch import format_board, parse_puzzle
+from sudoku_board import Board, as_board
+from sudoku_logic import geometry, masks_from_cells, propagate
+from sudoku_search import ResumableSearch
+from sudoku_stats import SearchStats, phase
+
+DEFAULT_DEPTH = 5
+SLICE_NODES = 500 # nodes a worker searches between checks of the stop flag
+
+
+# --------------------------------------------------
+# Frontier
+# --------------------------------------------------
+
+def _children(cells, geo, solved, stats=None):
+    # Propagates one node and branches on its MRV cell. Returns the child
+    # nodes as flat cell bytes; a node that propagation completes goes to
+    # `solved` instead, and a dead one has no children.
+    cells = bytearray(cells)
+    rows, cols, boxes, empty_cells = masks_from_cells(cells, geo)
+    elim = [0] * geo.ncells
+    trail = []
+    ok = propagate(cells, rows, cols, boxes, empty_cells, elim, trail, geo)
+    if stats is not None:
+        stats.nodes += 1
+        stats.propagations += 1
+        stats.forced += len(trail)
+    if ok and not empty_cells:
+        solved.append(bytes(cells))
+        return []
+
+    full_mask, popcount = geo.full_mask, geo.popcount
+    cell_row, cell_col, cell_box = geo.cell_row, geo.cell_col, geo.cell_box
+    best = -1
+    best_free = 0
+    best_count = geo.size + 1
+    for i in empty_cells if ok else ():
+        free = full_mask & ~(rows[cell_row[i]] | cols[cell_col[i]] | boxes[cell_box[i]] | elim[i])
+        count = popcount[free]
+        if count < best_count:
+            best, best_free, best_count = i, free, count
+            if count <= 1:
+                break
+    if best < 0 or best_count == 0:
+        if stats is not None:
+            stats.backtracks += 1
+        return []
+
+    children = []
+    for val, _ in geo.candidates[best_free]:
+        cells[best] = val
+        children.append(bytes(cells))
+    return children
+
+
+def split(board, depth=DEFAULT_DEPTH, stats=None):
+    """
+    Expand the search tree of `board` down to `depth` levels of branching.
+
+    Dead branches are dropped on the way, and so is any node that
+    propagation completes. Those nodes are returned separately, so the pool
+    only ever gets subtrees that still need a search.
+
+    Returns:
+        tuple[list[bytes], list[bytes]]: open frontier nodes and solved
+        grids, both as flat cells.
+    """
+    board = as_board(board)
+    geo = geometry(board.size)
+    frontier = [bytes(board.cells)]
+    solved = []
+    for _ in range(depth):
+        if not frontier:
+            break
+        frontier = [child for cells in frontier for child in _children(cells, geo, solved, stats)]
+    return frontier, solved
+
+
+# --------------------------------------------------
+# Workers
+# --------------------------------------------------
+
+_stop = None # this worker's copy of the pool's stop Event (None when serial)
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+
+def _search_subtree(job):
+    # Runs inside a pool worker: must be a top-level function so it pickles.
+    # Returns (solution count, first solution as cells or None, SearchStats
+    # or None). Once the stop flag is set the rest of the subtree is
+    # skipped; the parent ignores those results.
+    cells, limit, with_stats = job
+    stats = SearchStats() if with_stats else None
+    if _stop is not None and _stop.is_set():
+        return 0, None, stats
+    search = ResumableSearch(Board(cells), limit=limit, stats=stats)
+    while not search.run(SLICE_NODES):
+        if _stop is not None and _stop.is_set():
+            break
+    solved = search.solution
+    return search.count, (bytes(solved.cells) if solved else None), stats
+
+
+def _run(jobs, workers, take):
+    # Hands the jobs to `workers` processes and every result to
+    # take(result) until it returns True. Then the stop flag is set, the
+    # remaining results (cut short by the flag) are drained, and the pool
+    # is closed and joined normally.
+    if workers == 1 or len(jobs) <= 1:
+        # Skip the pool entirely; avoids fork + pickling overhead.
+        for job in jobs:
+            if take(_search_subtree(job)):
+                return
+        return
+
+    stop = multiprocessing.Event()
+    with multiprocessing.Pool(processes=min(workers, len(jobs)), initializer=_init_worker,
+                              initargs=(stop,)) as pool:
+        for result in pool.imap_unordered(_search_subtree, jobs, chunksize=1):
+            if not stop.is_set() and take(result):
+                stop.set()
+        pool.close()
+        pool.join()
+
+
+def _merge(stats, worker_stats, depth):
+    # Worker depths start below the frontier
+    if stats is not None and worker_stats is not None:
+        worker_stats.max_depth += depth
+        stats.merge(worker_stats)
+
+
+# --------------------------------------------------
+# Parallel search
+# --------------------------------------------------
+
+def count_solutions(board, limit=2, depth=DEFAULT_DEPTH, workers=None, stats=None):
+    """
+    Count the solutions of `board` over a process pool, stopping at `limit`.
+
+    Same result as BitmaskSolver.count_solutions: the count is exact below
+    `limit`, and once the subtree counts reach it all workers are stopped.
+
+    Args:
+        board (Board): The puzzle; left unchanged.
+        limit (int): Stop once this many solutions were found.
+        depth (int): Levels of branching expanded before handing out subtrees.
+        workers (int | None): Worker processes (default: number of cores).
+        stats (SearchStats | None): Collects the frontier's and all workers' work.
+
+    Returns:
+        int: Number of solutions found.
+    """
+    with phase(stats, "setup"):
+        frontier, solved = split(board, depth, stats)
+    total = [len(solved)]
+    if total[0] >= limit:
+        return total[0]
+
+    def take(result):
+        count, _, worker_stats = result
+        total[0] += count
+        _merge(stats, worker_stats, depth)
+        return total[0] >= limit
+
+    jobs = [(cells, limit, stats is not None) for cells in frontier]
+    with phase(stats, "search"):
+        _run(jobs, workers or os.cpu_count() or 1, take)
+    return total[0]
+
+
+def solve(board, depth=DEFAULT_DEPTH, workers=None, stats=None):
+    """
+    Solve `board` over a process pool, returning the first solution found.
+
+    Args:
+        board (Board): The puzzle; left unchanged.
+        depth (int): Levels of branching expanded before handing out subtrees.
+        workers (int | None): Worker processes (default: number of cores).
+        stats (SearchStats | None): Collects the frontier's and all workers' work.
+
+    Returns:
+        Board | None: A new solved board, or None if there is no solution.
+    """
+    with phase(stats, "setup"):
+        frontier, solved = split(board, depth, stats)
+    if solved:
+        return Board(solved[0])
+    found = []
+
+    def take(result):
+        _, cells, worker_stats = result
+        _merge(stats, worker_stats, depth)
+        if cells is not None:
+            found.append(cells)
+        return bool(found)
+
+    jobs = [(cells, 1, stats is not None) for cells in frontier]
+    with phase(stats, "search"):
+        _run(jobs, workers or os.cpu_count() or 1, take)
+    return Board(found[0]) if found else None
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve or count one hard Sudoku over a process pool.")
+    parser.add_argument("puzzle", help="puzzle line (81, 256 or 625 characters)")
+    parser.add_argument("--count", action="store_true", help="count solutions instead of solving")
+    parser.add_argument("--limit", type=int, default=2, help="with --count: stop at this many solutions")
+    parser.add_argument("-d", "--depth", type=int, default=DEFAULT_DEPTH,
+                        help="levels of branching expanded before handing out subtrees")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: number of cores)")
+    parser.add_argument("--stats", action="store_true", help="print search counters")
+    args = parser.parse_args(argv)
+
+    try:
+        board = parse_puzzle(args.puzzle)
+    except ValueError as e:
+        parser.error(str(e))
+    stats = SearchStats() if args.stats else None
+    start = time.perf_counter()
+    if args.count:
+        result = count_solutions(board, args.limit, args.depth, args.workers, stats)
+        print(result)
+    else:
+        solved = solve(board, args.depth, args.workers, stats)
+        result = solved is not None
+        print(format_board(solved) if solved else "unsolvable")
+    print(f"{time.perf_counter() - start:.3f}s", file=sys.stderr)
+    if stats is not None:
+        print(stats.summary(), file=sys.stderr)
+    return 0 if result else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# Background puzzle prefetching.
+#
+# PuzzlePool keeps a small ready queue of generated puzzles per difficulty,
+# refilled by a daemon thread while the user plays, so "New Game" and
+# difficulty changes only pop a queue instead of generating on the Tk thread.
+# take() never generates: when a queue is empty it returns None and the game
+# generates on a worker thread itself.
+# Unused puzzles are saved to a JSON file on close and reloaded on start.
+# Given a PuzzleLibrary (sudoku_library.py), difficulties the library has
+# puzzles for are drawn from it instead and never generated.
+# A make_puzzle that raises is reported on stderr and retried after a short
+# pause, so one bad generation doesn't stop the refills for the session.
+
+import json
+import os
+import threading
+import traceback
+from collections import deque
+
+from sudoku_board import Board
+
+
+class PuzzlePool:
+    RETRY_DELAY = 1.0 # seconds to wait after make_puzzle raised
+
+    def __init__(self, make_puzzle, difficulties=("Easy", "Medium", "Hard"),
+                 size=3, path=None, library=None):
+        """
+        Args:
+            make_puzzle (callable): make_puzzle(difficulty) -> (puzzle, solution).
+                Runs on the worker thread, so it must not touch widgets or
+                shared game state.
+            difficulties (tuple[str]): Keys to keep queues for.
+            size (int): Target number of ready puzzles per difficulty.
+            path (str | None): JSON file used to persist unused puzzles.
+            library (PuzzleLibrary | None): Prebuilt puzzles, keyed by the
+                same difficulty names.
+        """
+        self.make_puzzle = make_puzzle
+        self.size = size
+        self.path = path
+        self.queues = {d: deque() for d in difficulties}
+        self.library = library
+        # Difficulties served from the library rather than the queues
+        self.from_library = {d for d in difficulties if library is not None and library.count(d)}
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.load()
+
+    # --------------------------------------------------
+    # Public API
+    # --------------------------------------------------
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._worker, name="PuzzlePool", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.save()
+
+    def take(self, difficulty):
+        """Pop a ready (puzzle, solution) pair, or None if none is ready; never generates."""
+        if difficulty in self.from_library:
+            return self.library.random(difficulty)
+        with self.cond:
+            queue = self.queues.get(difficulty)
+            item = queue.popleft() if queue else None
+            self.cond.notify_all() # wake the worker to refill
+        return item
+
+    def ready(self, difficulty):
+        with self.cond:
+            return len(self.queues.get(difficulty, ()))
+
+    # --------------------------------------------------
+    # Persistence
+    # --------------------------------------------------
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return # unreadable cache: just regenerate
+        for difficulty, items in data.items():
+            if difficulty not in self.queues:
+                continue
+            for puzzle, solution in items:
+                try:
+                    item = (Board.from_line(puzzle), Board.from_line(solution))
+                except ValueError:
+                    continue
+                self.queues[difficulty].append(item)
+
+    def save(self):
+        if not self.path:
+            return
+        with self.cond:
+            data = {d: [(p.to_line(), s.to_line()) for p, s in q]
+                    for d, q in self.queues.items()}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    # --------------------------------------------------
+    # Worker
+    # --------------------------------------------------
+
+    def _next_to_fill(self):
+        # Emptiest queue first, so a drained difficulty is refilled soonest
+        generated = [d for d in self.queues if d not in self.from_library]
+        if not generated:
+            return None
+        difficulty = min(generated, key=lambda d: len(self.queues[d]))
+        if len(self.queues[difficulty]) >= self.size:
+            return None
+        return difficulty
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                difficulty = self._next_to_fill()
+                while self.running and difficulty is None:
+                    self.cond.wait()
+                    difficulty = self._next_to_fill()
+                if not self.running:
+                    return
+            try:
+                item = self.make_puzzle(difficulty) # generate outside the lock
+            except Exception:
+                traceback.print_exc()
+                with self.cond:
+                    self.cond.wait(self.RETRY_DELAY) # stop() still wakes us
+                continue
+            with self.cond:
+                self.queues[difficulty].append(item)
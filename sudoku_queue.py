@@ -0,0 +1,67 @@
+# Indexed MRV queue for the greedy and D&C games.
+#
+# Empty cells are kept in n + 1 buckets by candidate count (0-n, n = 9 on a
+# 9x9 grid). Each cell remembers its bucket and its slot in it, so changing a
+# cell's count is a swap-remove plus an append, and popping the most
+# constrained cell scans at most n + 1 buckets. A cell is in the queue at most
+# once, so a game's queue never holds stale entries and never grows past the
+# number of cells.
+
+class MRVQueue:
+    def __init__(self, grid_size=9):
+        self.grid_size = grid_size
+        self.buckets = [[] for _ in range(grid_size + 1)]
+        self.bucket_of = [-1] * (grid_size * grid_size) # -1 = not queued
+        self.slot = [0] * (grid_size * grid_size)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        return self.bucket_of[cell] >= 0
+
+    def clear(self):
+        for bucket in self.buckets:
+            bucket.clear()
+        self.bucket_of = [-1] * (self.grid_size * self.grid_size)
+        self.size = 0
+
+    def update(self, cell, count):
+        """Insert flat cell index `cell` with `count` candidates, or move it."""
+        if self.bucket_of[cell] == count:
+            return
+        self.discard(cell)
+        bucket = self.buckets[count]
+        self.bucket_of[cell] = count
+        self.slot[cell] = len(bucket)
+        bucket.append(cell)
+        self.size += 1
+
+    def discard(self, cell):
+        count = self.bucket_of[cell]
+        if count < 0:
+            return
+        bucket = self.buckets[count]
+        last = bucket.pop()
+        if last != cell:
+            # Move the last cell into the freed slot
+            idx = self.slot[cell]
+            bucket[idx] = last
+            self.slot[last] = idx
+        self.bucket_of[cell] = -1
+        self.size -= 1
+
+    def peek(self):
+        """(cell, count) of a most constrained cell, or None if empty."""
+        for count, bucket in enumerate(self.buckets):
+            if bucket:
+                return bucket[-1], count
+        return None
+
+    def pop(self):
+        """Remove and return (cell, count) of a most constrained cell, or None."""
+        item = self.peek()
+        if item is not None:
+            self.discard(item[0])
+        return item
@@ -0,0 +1,391 @@
+# Technique-based difficulty rating and band-targeted puzzle generation.
+#
+# rate() replays a puzzle through a logical solver that always uses the
+# easiest technique that makes progress:
+#
+#     1. hidden single      - a digit with one place left in a row/col/box
+#     2. naked single       - a cell with one candidate left
+#     3. locked candidates  - pointing / claiming between a box and a line
+#     4. naked pair         - two cells of a unit sharing the same two digits
+#     5. search             - none of the above applies: guess and backtrack
+#
+# The rating is the hardest technique the puzzle needed plus the number of
+# guesses. Candidates are kept as 9-bit masks and updated per placement, so
+# rating a typical generated puzzle takes well under a millisecond and a
+# generator can afford to rate every candidate it considers.
+#
+# Usage:
+#     python sudoku_rating.py puzzles.txt
+#
+# Output: <puzzle>\t<band>\t<hardest technique>\t<guesses>
+
+import argparse
+import random
+import sys
+import time
+
+from sudoku_board import Board, as_board
+from sudoku_logic import (FULL_MASK, POPCOUNT, CANDIDATES, CELL_ROW, CELL_COL, CELL_BOX, UNITS,
+                          INTERSECTIONS, PEERS, masks_from_cells)
+
+HIDDEN_SINGLE = 1
+NAKED_SINGLE = 2
+LOCKED_CANDIDATES = 3
+NAKED_PAIR = 4
+SEARCH = 5
+TECHNIQUE_NAMES = {0: "none", HIDDEN_SINGLE: "hidden single", NAKED_SINGLE: "naked single",
+                   LOCKED_CANDIDATES: "locked candidates", NAKED_PAIR: "naked pair", SEARCH: "search"}
+
+# Difficulty band -> (easiest, hardest) technique a puzzle in it may need
+BANDS = {
+    "Easy": (0, NAKED_SINGLE),
+    "Medium": (LOCKED_CANDIDATES, NAKED_PAIR),
+    "Hard": (SEARCH, SEARCH),
+}
+
+_SOLVED = 1
+_STUCK = 0
+_CONTRADICTION = -1
+
+
+class Rating:
+    __slots__ = ("level", "branches", "steps", "solved")
+
+    def __init__(self):
+        self.level = 0 # hardest technique used
+        self.branches = 0 # guesses made while searching
+        self.steps = 0 # logical rounds that made progress
+        self.solved = False
+
+    @property
+    def technique(self):
+        return TECHNIQUE_NAMES[self.level]
+
+    @property
+    def score(self):
+        """Single sortable number: technique level first, then guesses."""
+        return self.level * 1000 + min(self.branches, 999)
+
+    def __repr__(self):
+        return f"Rating({self.technique}, branches={self.branches}, steps={self.steps}, solved={self.solved})"
+
+
+# --------------------------------------------------
+# Logical solver
+# --------------------------------------------------
+
+def _place(cells, cand, i, bit):
+    cells[i] = CANDIDATES[bit][0][0]
+    cand[i] = 0
+    for p in PEERS[i]:
+        cand[p] &= ~bit
+
+
+def _too_hard(rating, level):
+    # The next step needs `level`, above the caller's max_level
+    rating.level = level
+    return _STUCK
+
+
+def _logic(cells, cand, rating, max_level=SEARCH):
+    # Apply techniques, easiest first, until the grid is solved or stuck.
+    # `cand` holds the candidate mask of every empty cell (0 when filled).
+    while True:
+        empty = [i for i in range(81) if not cells[i]]
+        if not empty:
+            return _SOLVED
+        for i in empty:
+            if not cand[i]:
+                return _CONTRADICTION
+
+        # 1. Hidden singles, and units that lost every place for a digit
+        forced = {}
+        for unit in UNITS:
+            once = more = placed = 0
+            for i in unit:
+                v = cells[i]
+                if v:
+                    placed |= 1 << (v - 1)
+                else:
+                    m = cand[i]
+                    more |= once & m
+                    once |= m
+            if (once | placed) != FULL_MASK:
+                return _CONTRADICTION
+            hidden = once & ~more
+            if hidden:
+                for i in unit:
+                    bit = cand[i] & hidden
+                    if bit:
+                        if POPCOUNT[bit] > 1 or forced.get(i, bit) != bit:
+                            return _CONTRADICTION # one cell needs two digits
+                        forced[i] = bit
+        level = HIDDEN_SINGLE
+
+        # 2. Naked singles
+        if not forced:
+            if max_level < NAKED_SINGLE:
+                return _too_hard(rating, NAKED_SINGLE)
+            for i in empty:
+                if POPCOUNT[cand[i]] == 1:
+                    forced[i] = cand[i]
+            level = NAKED_SINGLE
+
+        if forced:
+            for i, bit in forced.items():
+                if not cand[i] & bit:
+                    return _CONTRADICTION # a peer took the digit this round
+                _place(cells, cand, i, bit)
+            rating.steps += 1
+            if level > rating.level:
+                rating.level = level
+            continue
+
+        # 3. Locked candidates / 4. naked pairs
+        if max_level < LOCKED_CANDIDATES:
+            return _too_hard(rating, LOCKED_CANDIDATES)
+        if _locked_candidates(cand):
+            level = LOCKED_CANDIDATES
+        elif max_level < NAKED_PAIR:
+            return _too_hard(rating, NAKED_PAIR)
+        elif _naked_pairs(cand):
+            level = NAKED_PAIR
+        else:
+            return _STUCK
+        rating.steps += 1
+        if level > rating.level:
+            rating.level = level
+
+
+def _locked_candidates(cand):
+    # Same rule as sudoku_logic.propagate, on the rater's own masks
+    changed = False
+    for overlap, line_rest, box_rest in INTERSECTIONS:
+        seg = cand[overlap[0]] | cand[overlap[1]] | cand[overlap[2]]
+        if not seg:
+            continue
+        outside_box = outside_line = 0
+        for i in line_rest:
+            outside_box |= cand[i]
+        for i in box_rest:
+            outside_line |= cand[i]
+        pointing = seg & ~outside_line & outside_box
+        if pointing:
+            for i in line_rest:
+                cand[i] &= ~pointing
+            changed = True
+        claiming = seg & ~outside_box & outside_line
+        if claiming:
+            for i in box_rest:
+                cand[i] &= ~claiming
+            changed = True
+    return changed
+
+
+def _naked_pairs(cand):
+    changed = False
+    for unit in UNITS:
+        seen = {}
+        for i in unit:
+            m = cand[i]
+            if POPCOUNT[m] != 2:
+                continue
+            j = seen.get(m)
+            if j is None:
+                seen[m] = i
+                continue
+            for k in unit:
+                if k != i and k != j and cand[k] & m:
+                    cand[k] &= ~m
+                    changed = True
+    return changed
+
+
+def _search(cells, cand, rating):
+    status = _logic(cells, cand, rating)
+    if status != _STUCK:
+        return status == _SOLVED
+    rating.level = SEARCH
+    # Guess on the cell with the fewest candidates
+    best = min((i for i in range(81) if not cells[i]), key=lambda i: POPCOUNT[cand[i]])
+    for _, bit in CANDIDATES[cand[best]]:
+        rating.branches += 1
+        trial_cells = bytearray(cells)
+        trial_cand = cand[:]
+        _place(trial_cells, trial_cand, best, bit)
+        if _search(trial_cells, trial_cand, rating):
+            cells[:] = trial_cells
+            return True
+    return False
+
+
+# --------------------------------------------------
+# Public API
+# --------------------------------------------------
+
+def rate(board, max_level=SEARCH):
+    """
+    Rate a puzzle by the techniques needed to solve it.
+
+    Args:
+        board (Board | list[list[int]]): 9x9 puzzle; not modified.
+        max_level (int): Give up as soon as the puzzle needs a harder
+            technique than this (the returned rating then has that harder
+            level and solved=False). Lets generators reject candidates early.
+
+    Returns:
+        Rating: hardest technique (`level` / `technique`), guesses
+        (`branches`), progress rounds (`steps`) and whether it was solved.
+    """
+    board = as_board(board)
+    if board.size != 9:
+        raise ValueError(f"only 9x9 grids can be rated, not {board.size}x{board.size}")
+    cells = bytearray(board.cells)
+    rows, cols, boxes, empty_cells = masks_from_cells(cells)
+    cand = [0] * 81
+    for i in empty_cells:
+        cand[i] = FULL_MASK & ~(rows[CELL_ROW[i]] | cols[CELL_COL[i]] | boxes[CELL_BOX[i]])
+
+    rating = Rating()
+    if max_level >= SEARCH:
+        rating.solved = _search(cells, cand, rating)
+        return rating
+    status = _logic(cells, cand, rating, max_level)
+    if status == _STUCK and rating.level <= max_level:
+        rating.level = SEARCH # logic ran out: only guessing would finish it
+    rating.solved = status == _SOLVED
+    return rating
+
+
+def band_of(rating):
+    """Difficulty band ("Easy", "Medium", "Hard") a rating falls in."""
+    for name, (low, high) in BANDS.items():
+        if low <= rating.level <= high:
+            return name
+    return "Hard"
+
+
+def in_band(board, difficulty):
+    """True if `board` rates inside BANDS[difficulty] (early exit above it)."""
+    low, high = BANDS[difficulty]
+    rating = rate(board, high)
+    return rating.solved and low <= rating.level <= high
+
+
+# --------------------------------------------------
+# Generation
+# --------------------------------------------------
+
+# Fresh solved grids tried by generate_in_band before settling for a miss
+MAX_ATTEMPTS = 30
+
+# The rater only handles 9x9 grids. Other sizes are graded by the share of
+# cells dug out instead. Past about 60% holes on 16x16 and 50% on 25x25,
+# uniqueness tests and the solvers themselves slow down sharply, so the
+# big grids stop short of that.
+HOLE_FRACTIONS = {
+    4: {"Easy": 0.40, "Medium": 0.55, "Hard": 0.65},
+    16: {"Easy": 0.40, "Medium": 0.50, "Hard": 0.56},
+    25: {"Easy": 0.35, "Medium": 0.40, "Hard": 0.45},
+}
+
+def dig_in_band(board, cells, difficulty, target_holes=81, dig_unique=None):
+    """
+    Remove clues from a solved `board` in place, staying under a band's ceiling.
+
+    For Easy and Medium a clue is only removed if the puzzle stays solvable
+    with the band's hardest technique, which also keeps the solution unique.
+    Hard has no logical ceiling: clues are removed by `dig_unique`, or
+    unchecked if it is None (the puzzle may then have several solutions).
+
+    Args:
+        board (Board): A fully solved grid; becomes the puzzle.
+        cells (list[int]): Flat cell indices to try, in order.
+        difficulty (str): Key of BANDS.
+        target_holes (int): Stop after this many removals.
+        dig_unique (callable | None): dig_unique(board, cells, target_holes)
+            -> holes, e.g. BitmaskSolver.dig_holes.
+
+    Returns:
+        int: Number of holes dug.
+    """
+    high = BANDS[difficulty][1]
+    grid = board.cells
+    if high >= SEARCH:
+        if dig_unique is not None:
+            return dig_unique(board, cells, target_holes)
+        cells = [i for i in cells if grid[i]][:target_holes]
+        for i in cells:
+            grid[i] = 0
+        return len(cells)
+
+    holes = 0
+    for i in cells:
+        if holes >= target_holes:
+            break
+        val = grid[i]
+        if not val:
+            continue
+        grid[i] = 0
+        if rate(board, high).solved:
+            holes += 1
+        else:
+            grid[i] = val
+    return holes
+
+
+def generate_in_band(new_grid, difficulty, target_holes=81, dig_unique=None):
+    """
+    A (puzzle, solution) pair rated inside BANDS[difficulty].
+
+    Digging already respects the band's ceiling. Only the floor can miss,
+    for example a Medium dig that never needed more than singles. Then a
+    new grid is tried, up to MAX_ATTEMPTS times, and the last puzzle is
+    kept if none lands in the band.
+
+    Args:
+        new_grid (callable): new_grid() -> a fresh, fully solved Board.
+        difficulty, target_holes, dig_unique: as for dig_in_band.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        solution = new_grid()
+        board = solution.copy()
+        cells = list(range(81))
+        random.shuffle(cells)
+        dig_in_band(board, cells, difficulty, target_holes, dig_unique)
+        if in_band(board, difficulty):
+            break
+    return board, solution
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+
+def main(argv=None):
+    from sudoku_batch import read_puzzles
+
+    parser = argparse.ArgumentParser(description="Rate Sudoku puzzles by the techniques they need.")
+    parser.add_argument("input", help="file with one 81-character puzzle per line")
+    args = parser.parse_args(argv)
+
+    counts = {}
+    start = time.perf_counter()
+    for line in read_puzzles(args.input):
+        try:
+            rating = rate(Board.from_line(line))
+        except ValueError as e:
+            print(f"{line}\terror: {e}")
+            continue
+        band = band_of(rating) if rating.solved else "invalid"
+        counts[band] = counts.get(band, 0) + 1
+        print(f"{line}\t{band}\t{rating.technique}\t{rating.branches}")
+    wall = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"{total} puzzles ({', '.join(f'{v} {k}' for k, v in counts.items())}) in {wall:.2f}s, "
+          f"{total / wall if wall else 0:.0f}/s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
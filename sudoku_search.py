@@ -0,0 +1,152 @@
+# Iterative, resumable bitmask search.
+#
+# Same search as BitmaskSolver (propagation + dynamic MRV at every node), but
+# driven by an explicit stack instead of Python recursion, so it can run for a
+# budget of N nodes, return, and pick up where it left off on the next call.
+# The GUI can time-slice a long solve across root.after callbacks, and batch
+# runs avoid per-node frame overhead and recursion-depth limits.
+
+from sudoku_board import Board
+from sudoku_logic import geometry, masks_from_cells, propagate, undo
+
+
+class ResumableSearch:
+    def __init__(self, board, limit=1, use_propagation=True, stats=None):
+        """
+        Args:
+            board (Board | list[list[int]]): Puzzle to solve, any grid size;
+                copied, never mutated.
+            limit (int): Stop after this many solutions (1 = solve,
+                         2 = uniqueness check).
+            use_propagation (bool): Run logical deductions at every node.
+            stats (SearchStats | None): Work counters, filled in as the
+                search runs. Cells forced by propagation are not counted.
+        """
+        self.board = Board(board)
+        self.cells = self.board.cells
+        self.geo = geometry(self.board.size)
+        self.rows, self.cols, self.boxes, self.empty_cells = masks_from_cells(self.cells, self.geo)
+        self.limit = limit
+        self.use_propagation = use_propagation
+
+        self.solutions = []
+        self.nodes = 0
+        self.done = False
+        # Each frame: [cell, candidates, next_index, trail, elim]
+        self.stack = []
+        self.stats = stats
+        self._stats_pending = stats is not None
+        if stats is not None:
+            self._enter = self._enter_counted
+        self._enter([0] * self.geo.ncells)
+
+    @property
+    def count(self):
+        return len(self.solutions)
+
+    @property
+    def solution(self):
+        return self.solutions[0] if self.solutions else None
+
+    def run(self, max_nodes=None):
+        """
+        Advance the search.
+
+        Args:
+            max_nodes (int | None): Node budget for this call; None runs to
+                                    completion.
+
+        Returns:
+            bool: True once the search has finished (see `solutions`), False
+                  if it paused because the budget ran out.
+        """
+        cells, rows, cols, boxes = self.cells, self.rows, self.cols, self.boxes
+        geo = self.geo
+        cell_row, cell_col, cell_box = geo.cell_row, geo.cell_col, geo.cell_box
+        stack = self.stack
+        budget = max_nodes
+        while stack and not self.done:
+            if budget is not None:
+                if budget <= 0:
+                    return False
+                budget -= 1
+
+            frame = stack[-1]
+            cell, cands, i, trail, elim = frame
+            r, c, box_idx = cell_row[cell], cell_col[cell], cell_box[cell]
+            if i:
+                # Take back the previous branch of this frame
+                mask = cands[i - 1][1]
+                rows[r] &= ~mask; cols[c] &= ~mask; boxes[box_idx] &= ~mask
+                cells[cell] = 0
+
+            if i < len(cands):
+                val, mask = cands[i]
+                frame[2] = i + 1
+                cells[cell] = val
+                rows[r] |= mask; cols[c] |= mask; boxes[box_idx] |= mask
+                self._enter(elim)
+            else:
+                # All branches tried: restore the cell and this node's deductions
+                stack.pop()
+                self.empty_cells.append(cell)
+                undo(cells, rows, cols, boxes, self.empty_cells, trail, geo)
+
+        self.done = True
+        if self._stats_pending:
+            self._stats_pending = False
+            # Frames still stacked are the path to the last solution found;
+            # the search backed out of every other node
+            on_path = len(stack) + 1 if self.solutions and stack else len(self.solutions)
+            self.stats.backtracks += self.nodes - on_path
+        return True
+
+    def _enter_counted(self, parent_elim):
+        # _enter when stats are on: nodes, depth and propagation passes
+        stats = self.stats
+        stats.nodes += 1
+        stats.max_depth = max(stats.max_depth, len(self.stack) + 1)
+        if self.use_propagation:
+            stats.propagations += 1
+        ResumableSearch._enter(self, parent_elim)
+
+    def _enter(self, parent_elim):
+        # Expand one node: propagate, then either record a solution, fail, or
+        # push a branching frame on the most constrained cell.
+        self.nodes += 1
+        cells, rows, cols, boxes = self.cells, self.rows, self.cols, self.boxes
+        geo = self.geo
+        empty_cells = self.empty_cells
+        elim = parent_elim[:]
+        trail = []
+        if self.use_propagation and not propagate(cells, rows, cols, boxes, empty_cells, elim, trail, geo):
+            undo(cells, rows, cols, boxes, empty_cells, trail, geo)
+            return
+
+        if not empty_cells:
+            self.solutions.append(self.board.copy())
+            undo(cells, rows, cols, boxes, empty_cells, trail, geo)
+            if len(self.solutions) >= self.limit:
+                self.done = True
+            return
+
+        # Dynamic MRV
+        full_mask, popcount = geo.full_mask, geo.popcount
+        cell_row, cell_col, cell_box = geo.cell_row, geo.cell_col, geo.cell_box
+        best_idx = -1
+        best_free = 0
+        best_count = geo.size + 1
+        for idx, i in enumerate(empty_cells):
+            free = full_mask & ~(rows[cell_row[i]] | cols[cell_col[i]] | boxes[cell_box[i]] | elim[i])
+            count = popcount[free]
+            if count < best_count:
+                if count == 0:
+                    undo(cells, rows, cols, boxes, empty_cells, trail, geo)
+                    return
+                best_idx, best_free, best_count = idx, free, count
+                if count == 1:
+                    break
+
+        empty_cells[best_idx], empty_cells[-1] = empty_cells[-1], empty_cells[best_idx]
+        cell = empty_cells.pop()
+        self.stack.append([cell, geo.candidates[best_free], 0, trail, elim])
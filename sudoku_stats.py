@@ -0,0 +1,110 @@
+# Optional search statistics.
+#
+# Solvers take `stats=None`. Given a SearchStats they count their work into
+# it; without one they run the same code as before. BitmaskSolver, DLXSolver
+# and ResumableSearch swap in counting wrappers for their recursive steps only
+# when stats are passed, so the plain path has no extra checks per node.
+#
+# Counters:
+#     nodes         - search nodes expanded
+#     backtracks    - nodes the search had to back out of (dead ends)
+#     max_depth     - deepest node reached
+#     propagations  - propagate() passes
+#     forced        - cells filled by those passes
+#     count_calls   - uniqueness checks (count_solutions, and each removal
+#                     tested by dig_holes) made while generating puzzles
+#     probes        - lookahead positions the greedy AI tested before
+#                     committing a digit (its nodes are the moves played)
+#     phases        - seconds per named phase (setup, search, propagate,
+#                     fill, dig); propagate time is part of search time
+
+import time
+from contextlib import contextmanager, nullcontext
+from functools import partial
+
+_NO_PHASE = nullcontext()
+
+
+class SearchStats:
+    COUNTERS = ("nodes", "backtracks", "max_depth", "propagations", "forced", "count_calls", "probes")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.propagations = 0
+        self.forced = 0
+        self.count_calls = 0
+        self.probes = 0
+        self.phases = {}
+
+    # --------------------------------------------------
+    # Recording
+    # --------------------------------------------------
+
+    def call(self, step, *args):
+        """
+        Run one search node, `step(*args)`, and count it.
+
+        A falsy result (False, None, 0 solutions) counts as a backtrack.
+        Depth is restored even if `step` raises (cancelled searches).
+        """
+        self.nodes += 1
+        self.depth += 1
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+        try:
+            result = step(*args)
+        finally:
+            self.depth -= 1
+        if not result:
+            self.backtracks += 1
+        return result
+
+    def counted(self, step):
+        # `step` with every call routed through self.call
+        return partial(self.call, step)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def merge(self, other):
+        for name in self.COUNTERS:
+            if name == "max_depth":
+                self.max_depth = max(self.max_depth, other.max_depth)
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name, seconds in other.phases.items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    # --------------------------------------------------
+    # Reporting
+    # --------------------------------------------------
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.COUNTERS}
+        data["phases_ms"] = {name: seconds * 1000.0 for name, seconds in self.phases.items()}
+        return data
+
+    def summary(self):
+        """One line of key=value pairs; zero counters are left out."""
+        parts = [f"{name}={getattr(self, name)}" for name in self.COUNTERS if getattr(self, name)]
+        parts += [f"{name}={seconds * 1000.0:.1f}ms" for name, seconds in list(self.phases.items())]
+        return " ".join(parts) or "no search"
+
+    def __repr__(self):
+        return f"SearchStats({self.summary()})"
+
+
+def phase(stats, name):
+    """stats.phase(name), or a shared no-op context when `stats` is None."""
+    return _NO_PHASE if stats is None else stats.phase(name)
@@ -0,0 +1,248 @@
+# Vectorized candidate masks and singles for many boards at once (NumPy).
+#
+# Boards are an (N, 9, 9) uint8 array (0 = empty). Unit masks, candidate
+# masks and naked/hidden singles are computed for all N boards with a few
+# whole-array operations, and propagate_batch repeats singles until every
+# board is solved, stuck (needs search) or contradictory. Boards that settle
+# drop out of the working set, so later rounds only touch the ones still
+# changing.
+#
+# Meant for bulk validation and pre-solving; the interactive games keep the
+# per-cell code in sudoku_logic.py. NumPy is optional for the rest of the
+# project, so it is only imported here.
+#
+# Usage:
+#     python sudoku_vector.py puzzles.txt -o presolved.txt
+#
+# Output: <puzzle>\t<board after singles>\t<solved | stuck | invalid>
+
+import argparse
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError: # optional dependency; see _require_numpy
+    np = None
+
+from sudoku_board import Board
+from sudoku_logic import UNITS, CELL_UNITS
+
+SOLVED = 1
+STUCK = 0
+INVALID = -1
+STATUS_NAMES = {SOLVED: "solved", STUCK: "stuck", INVALID: "invalid"}
+
+if np is not None:
+    FULL_MASK = np.uint16(0x1FF)
+    # digit -> bit (0 -> 0), bit k -> digit k+1 (0 unless exactly one bit)
+    _DIGIT_BIT = np.array([0] + [1 << k for k in range(9)], dtype=np.uint16)
+    _BIT_DIGIT = np.zeros(512, dtype=np.uint8)
+    _BIT_DIGIT[_DIGIT_BIT[1:]] = np.arange(1, 10, dtype=np.uint8)
+    # Gather tables: flat cells of each unit (27, 9), units of each cell (81, 3)
+    _UNIT_CELLS = np.array(UNITS, dtype=np.intp)
+    _CELL_UNITS = np.array(CELL_UNITS, dtype=np.intp)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("sudoku_vector needs NumPy (pip install numpy)")
+
+
+# --------------------------------------------------
+# Conversion
+# --------------------------------------------------
+
+def boards_to_array(boards):
+    """
+    (N, 9, 9) uint8 array from Boards and/or 81-character puzzle lines.
+
+    Raises:
+        ValueError: for a line that does not parse, or a board that is not
+            9x9 (the masks here are 9-bit).
+    """
+    _require_numpy()
+    boards = [b if isinstance(b, Board) else Board.from_line(b) for b in boards]
+    for b in boards:
+        if b.size != 9:
+            raise ValueError(f"only 9x9 boards are supported, got {b.size}x{b.size}")
+    buf = b"".join(b.cells for b in boards)
+    return np.frombuffer(buf, dtype=np.uint8).reshape(-1, 9, 9).copy()
+
+
+def array_to_boards(grid):
+    return [Board(cells.tobytes()) for cells in np.asarray(grid, dtype=np.uint8).reshape(-1, 81)]
+
+
+# --------------------------------------------------
+# Masks
+# --------------------------------------------------
+# Everything works on flat (N, 81) views. Per-unit reductions gather the 27
+# units into an (N, 27, 9) array once and fold its 9 columns with whole-array
+# ORs, the same once/more trick sudoku_logic.propagate uses per unit.
+
+def _fold(units):
+    # (N, 27, 9) masks -> (once, more): digits seen at least once / twice
+    once = units[:, :, 0].copy()
+    more = np.zeros_like(once)
+    for k in range(1, 9):
+        m = units[:, :, k]
+        more |= once & m
+        once |= m
+    return once, more
+
+
+def unit_masks(grid):
+    """
+    Placed-digit masks per unit (bit k = digit k+1).
+
+    Returns:
+        (N, 27) uint16 array: rows 0-8, columns 9-17, boxes 18-26.
+    """
+    bits = _DIGIT_BIT[np.asarray(grid).reshape(-1, 81)]
+    return _fold(bits[:, _UNIT_CELLS])[0]
+
+
+def candidate_masks(grid, placed=None):
+    """(N, 9, 9) uint16 candidate masks; 0 for filled cells."""
+    grid = np.asarray(grid).reshape(-1, 81)
+    if placed is None:
+        placed = unit_masks(grid)
+    taken = np.bitwise_or.reduce(placed[:, _CELL_UNITS], axis=2)
+    return np.where(grid == 0, FULL_MASK & ~taken, 0).astype(np.uint16).reshape(-1, 9, 9)
+
+
+def naked_singles(cand):
+    """(N, 9, 9) bool: cells with exactly one candidate."""
+    return (cand != 0) & ((cand & (cand - 1)) == 0)
+
+
+def hidden_singles(cand):
+    """(N, 9, 9) uint16: per cell, the bits of digits that have no other place in one of its units."""
+    flat = cand.reshape(-1, 81)
+    once, more = _fold(flat[:, _UNIT_CELLS])
+    hidden = once & ~more
+    per_cell = np.bitwise_or.reduce(hidden[:, _CELL_UNITS], axis=2)
+    return (flat & per_cell).reshape(cand.shape)
+
+
+# --------------------------------------------------
+# Batched propagation
+# --------------------------------------------------
+
+def _contradictions(grid, cand):
+    # Boards with a repeated digit in a unit, an empty cell without
+    # candidates, or a unit where some digit has no place left
+    placed_once, placed_more = _fold(_DIGIT_BIT[grid.reshape(-1, 81)][:, _UNIT_CELLS])
+    cand_once = _fold(cand.reshape(-1, 81)[:, _UNIT_CELLS])[0]
+    bad = (placed_more != 0).any(axis=1)
+    bad |= ((grid == 0) & (cand == 0)).any(axis=(1, 2))
+    bad |= ((placed_once | cand_once) != FULL_MASK).any(axis=1)
+    return bad
+
+
+def propagate_batch(grid, max_rounds=81):
+    """
+    Fill naked and hidden singles on every board until nothing changes.
+
+    Args:
+        grid: (N, 9, 9) array-like of digits, 0 = empty. Not modified.
+        max_rounds (int): Upper bound on propagation rounds.
+
+    Returns:
+        tuple: (grid, status). `grid` is a new (N, 9, 9) uint8 array with the
+        forced digits filled in; `status` is an (N,) int8 array of SOLVED,
+        STUCK (singles ran out, search needed) or INVALID.
+    """
+    _require_numpy()
+    grid = np.array(grid, dtype=np.uint8).reshape(-1, 9, 9)
+    status = np.full(len(grid), STUCK, dtype=np.int8)
+    active = np.arange(len(grid))
+
+    for _ in range(max_rounds):
+        if not len(active):
+            break
+        sub = grid[active]
+        cand = candidate_masks(sub)
+
+        bad = _contradictions(sub, cand)
+        filled = (sub != 0).all(axis=(1, 2))
+        status[active[filled & ~bad]] = SOLVED
+
+        # One cell needing two different digits is a contradiction too
+        assign = np.where(naked_singles(cand), cand, 0) | hidden_singles(cand)
+        bad |= ((assign & (assign - 1)) != 0).any(axis=(1, 2))
+        status[active[bad]] = INVALID
+
+        progress = (assign != 0).any(axis=(1, 2)) & ~bad
+        changed = active[progress]
+        grid[changed] = np.where(assign[progress] != 0, _BIT_DIGIT[assign[progress]], sub[progress])
+        # Changed boards are re-checked next round (placements may collide)
+        active = changed
+    return grid, status
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+
+def _chunks(lines, size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main(argv=None):
+    from sudoku_batch import read_puzzles
+
+    parser = argparse.ArgumentParser(description="Validate and pre-solve puzzles in bulk with NumPy.")
+    parser.add_argument("input", help="file with one 81-character puzzle per line")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--chunk", type=int, default=4096,
+                        help="boards propagated together in one array")
+    args = parser.parse_args(argv)
+    _require_numpy()
+
+    out = open(args.output, "w", encoding="ascii") if args.output else sys.stdout
+    counts = {name: 0 for name in STATUS_NAMES.values()}
+    counts["error"] = 0
+    start = time.perf_counter()
+    try:
+        for chunk in _chunks(read_puzzles(args.input), args.chunk):
+            lines, boards = [], []
+            for line in chunk:
+                try:
+                    board = Board.from_line(line)
+                    if board.size != 9:
+                        raise ValueError(f"only 9x9 puzzles are supported, got {board.size}x{board.size}")
+                except ValueError as e:
+                    out.write(f"{line}\terror: {e}\terror\n")
+                    counts["error"] += 1
+                else:
+                    boards.append(board)
+                    lines.append(line)
+            if not boards:
+                continue
+            grid, status = propagate_batch(boards_to_array(boards))
+            for line, board, s in zip(lines, array_to_boards(grid), status):
+                name = STATUS_NAMES[int(s)]
+                out.write(f"{line}\t{board.to_line()}\t{name}\n")
+                counts[name] += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"{total} puzzles ({', '.join(f'{v} {k}' for k, v in counts.items())}) in {wall:.2f}s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# Off-thread AI computation for the Tk apps.
+#
+# AITask runs a compute function on a daemon thread while the Tk main loop
+# polls for the result with root.after, so a hard position never freezes the
+# window. Cancellation and the deadline are cooperative: compute receives a
+# `check` callable and must call it periodically (every N search nodes);
+# `check` raises Cancelled once the task was cancelled or ran out of time.
+# An exception from compute goes to on_error on the Tk thread, so the game
+# can drop the task and hand the turn back before the error is reported.
+
+import threading
+import time
+
+
+class Cancelled(Exception):
+    pass
+
+
+class AITask:
+    def __init__(self, root, compute, on_result, on_timeout=None, timeout=None, poll_ms=25,
+                 on_error=None):
+        """
+        Args:
+            root: Tk root used for polling.
+            compute (callable): compute(check) -> result. Runs off the Tk
+                thread, so it must work on snapshots, not live game state.
+            on_result (callable): on_result(result), called on the Tk thread.
+            on_timeout (callable | None): Called on the Tk thread if the
+                deadline passes before compute finishes.
+            timeout (float | None): Deadline in seconds; None = no deadline.
+            poll_ms (int): How often the Tk thread checks for completion.
+            on_error (callable | None): on_error(exception), called on the Tk
+                thread if compute raised. Without it the exception is
+                re-raised from the poll callback.
+        """
+        self.root = root
+        self.compute = compute
+        self.on_result = on_result
+        self.on_timeout = on_timeout
+        self.on_error = on_error
+        self.poll_ms = poll_ms
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.result = None
+        self.error = None
+        self.timed_out = False
+        self.after_id = None
+
+    def start(self):
+        threading.Thread(target=self._run, name="AITask", daemon=True).start()
+        self.after_id = self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        # Stop the worker at its next check() and drop any late result
+        self.cancelled.set()
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    @property
+    def running(self):
+        return not self.finished.is_set() and not self.cancelled.is_set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled()
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise Cancelled()
+
+    def _run(self):
+        try:
+            self.result = self.compute(self.check)
+        except Cancelled:
+            self.timed_out = not self.cancelled.is_set()
+        except Exception as e: # surfaced on the Tk thread in _poll
+            self.error = e
+        finally:
+            self.finished.set()
+
+    def _poll(self):
+        self.after_id = None
+        if self.cancelled.is_set():
+            return
+        if self.finished.is_set():
+            if self.error is not None:
+                if self.on_error is None:
+                    raise self.error
+                self.on_error(self.error)
+                return
+            if self.timed_out:
+                self._expire()
+            else:
+                self.on_result(self.result)
+            return
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self._expire()
+            return
+        self.after_id = self.root.after(self.poll_ms, self._poll)
+
+    def _expire(self):
+        self.cancelled.set()
+        if self.on_timeout:
+            self.on_timeout()
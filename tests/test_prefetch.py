@@ -0,0 +1,37 @@
+import time
+
+from sudoku_board import Board
+from sudoku_prefetch import PuzzlePool
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_failing_make_puzzle_does_not_stop_refills(monkeypatch):
+    monkeypatch.setattr(PuzzlePool, "RETRY_DELAY", 0.01)
+    calls = []
+
+    def make_puzzle(difficulty):
+        calls.append(difficulty)
+        if len(calls) == 1:
+            raise RuntimeError("generation bug")
+        return Board(), Board()
+
+    pool = PuzzlePool(make_puzzle, difficulties=("Easy",), size=2)
+    pool.start()
+    try:
+        assert _wait_for(lambda: pool.ready("Easy") == 2)
+        assert pool.take("Easy") is not None
+        # Taking one wakes the worker, which is still alive to refill it
+        assert _wait_for(lambda: pool.ready("Easy") == 2)
+    finally:
+        pool.stop()
+    assert len(calls) == 4
+    pool.thread.join(1.0)
+    assert not pool.thread.is_alive()
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import sudoku_vector
+from sudoku_board import Board
+
+LINE_16 = ".5F..8.A4.7....B.1......G59..68.6...71.4.3.BG.5...B2..F.A..E....G98....EC7..B......B.9.F.6A1C..3.61E4..C..2....8......5..9..EA61E.7..4D3.2.9..G..29..G6.1....C4DC4D3.....G.6..A7F.68.A...4C.5B...C...B..6.8.....8.A6......3.95BG....8.A..E1.D..21.47..2...5G.8FA"
+LINE_9 = "406032590951406002832001740180690407047183065600200813020518670018060034709300100"
+
+
+def test_boards_to_array_rejects_16x16():
+    with pytest.raises(ValueError, match="9x9"):
+        sudoku_vector.boards_to_array([LINE_16])
+    with pytest.raises(ValueError, match="9x9"):
+        sudoku_vector.boards_to_array([Board.from_line(LINE_16)])
+
+
+def test_main_reports_16x16_lines_as_errors(tmp_path, capsys):
+    path = tmp_path / "puzzles.txt"
+    path.write_text(f"{LINE_16}\n{LINE_9}\n")
+    assert sudoku_vector.main([str(path)]) == 0
+    first, second = capsys.readouterr().out.splitlines()
+    assert first.startswith(f"{LINE_16}\terror: ") and first.endswith("\terror")
+    assert second.endswith("\tsolved")